@@ -1,20 +1,36 @@
 # app.py
-from flask import Flask, render_template, request
-from scraper import scrape_article_data, close_driver, get_or_create_driver
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context, url_for
+from scraper import scrape_article_data, close_driver, warm_up_driver_pool
+from batch import read_urls, scrape_batch
+from result_cache import get_result_cache
+from jobs import JobQueue, QueueFull
+import metrics
+import resource_blocking
+import scraper
+from textstats import parse_banner_date
 import atexit
+import json
+import os
 
 app = Flask(__name__)
 app.secret_key = 'your_very_secret_key'
 
-# Initialize driver when app starts (if not in test mode)
-# This ensures the login prompt happens once when the app starts.
-if not app.testing:
-    try:
-        get_or_create_driver(headless=False) # Start non-headless for login
-    except Exception as e:
-        print(f"CRITICAL: Failed to initialize Selenium WebDriver on app startup: {e}")
-        # Optionally, exit or run in a degraded mode
-        # exit(1)
+# The driver pool starts lazily on the first scrape, so importing the app is
+# fast and needs no terminal. Set SCRAPER_WARM_UP=1 to launch Chrome (and the
+# login prompt, if no login has been saved yet) in the background at startup.
+if not app.testing and os.environ.get("SCRAPER_WARM_UP", "0") == "1":
+    warm_up_driver_pool()
+
+job_queue = JobQueue()
+
+
+def validate_article_url(article_url):
+    """Returns an error message for an unusable article URL, or None."""
+    if not article_url:
+        return "Please enter an article URL."
+    if not article_url.startswith("https://www.thebaltimorebanner.com/"):
+        return "Please enter a valid URL from thebaltimorebanner.com."
+    return None
 
 
 @app.route('/', methods=['GET', 'POST'])
@@ -22,34 +38,181 @@ def index():
     data = None
     error_message = None
     article_url_input = ""
+    refresh = False
+    timings = False
 
     if request.method == 'POST':
         article_url_input = request.form.get('article_url')
-        if article_url_input:
-            if not article_url_input.startswith("https://www.thebaltimorebanner.com/"):
-                error_message = "Please enter a valid URL from thebaltimorebanner.com."
-            else:
-                try:
-                    # The driver should already be initialized and logged in
-                    scraped_output = scrape_article_data(article_url_input)
-                    if "error" in scraped_output:
-                        error_message = scraped_output["error"]
-                    else:
-                        data = scraped_output
-                except Exception as e:
-                    error_message = f"An unexpected error occurred during scraping: {str(e)}"
-                    # Optionally, try to re-initialize driver or just report error
-                    print(f"Scraping error: {e}")
-        else:
-            error_message = "Please enter an article URL."
+        refresh = request.form.get('refresh') == 'on'
+        timings = request.form.get('timings') == 'on'
+        error_message = validate_article_url(article_url_input)
+        if not error_message:
+            try:
+                scraped_output = scrape_article_data(article_url_input, refresh=refresh, timings=timings)
+                if "error" in scraped_output:
+                    error_message = scraped_output["error"]
+                else:
+                    data = scraped_output
+            except Exception as e:
+                error_message = f"An unexpected error occurred during scraping: {str(e)}"
+                # Optionally, try to re-initialize driver or just report error
+                print(f"Scraping error: {e}")
             
-    return render_template('index.html', data=data, error=error_message, article_url=article_url_input)
+    return render_template('index.html', data=data, error=error_message, article_url=article_url_input,
+                           refresh=refresh, timings=timings)
+
+
+def _job_links(job_id):
+    return {
+        'status_url': url_for('job_status', job_id=job_id),
+        'events_url': url_for('job_events', job_id=job_id),
+        'html_url': url_for('job_html', job_id=job_id),
+    }
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queues a scrape and returns its job id right away (202). Takes 'article_url'
+    and optional 'refresh' and 'timings' as form fields or JSON. Answers 429 when the queue is
+    full. Requests for a URL that is already being scraped share that job.
+    """
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        article_url = payload.get('article_url') or payload.get('url')
+        refresh = payload.get('refresh') is True
+        timings = payload.get('timings') is True
+    else:
+        article_url = request.form.get('article_url')
+        refresh = request.form.get('refresh') == 'on'
+        timings = request.form.get('timings') == 'on'
+    article_url = article_url.strip() if isinstance(article_url, str) else None
+
+    error_message = validate_article_url(article_url)
+    if error_message:
+        return jsonify(error=error_message), 400
+    try:
+        job, created = job_queue.submit(article_url, refresh=refresh, timings=timings)
+    except QueueFull as e:
+        response = jsonify(error=f"The scraper is busy, please try again shortly. ({e})")
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    return jsonify({**job.to_dict(), 'created': created, **_job_links(job.id)}), 202
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    snapshot = job_queue.snapshot(job_id)
+    if snapshot is None:
+        return jsonify(error="No such job."), 404
+    return jsonify({**snapshot, **_job_links(job_id)})
+
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-Sent Events: one 'status' event per job change, ending when it finishes."""
+    if job_queue.get(job_id) is None:
+        return jsonify(error="No such job."), 404
+
+    def stream():
+        version = None
+        while True:
+            snapshot, version = job_queue.wait_for_change(job_id, version, timeout=15)
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: status\ndata: {json.dumps(snapshot)}\n\n"
+            if snapshot['status'] in ('done', 'error'):
+                return
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+@app.route('/jobs/<job_id>/html')
+def job_html(job_id):
+    """The results section of the page for a job, rendered like the form POST."""
+    snapshot = job_queue.snapshot(job_id)
+    if snapshot is None:
+        return render_template('_results.html', error="No such job."), 404
+    return render_template('_results.html', data=snapshot['result'], error=snapshot['error'])
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    """
+    Scrapes many articles and streams one JSON line per article as each finishes.
+    URLs come from a JSON body {"urls": [...]}, a form field 'urls' with one
+    URL per line, and/or an uploaded 'url_file'. Duplicates are scraped once.
+    A true 'refresh' (JSON) or refresh=on (form) bypasses the result cache, and
+    'timings' the same way adds each scrape's stage breakdown.
+    """
+    urls = []
+    refresh = request.form.get('refresh') == 'on'
+    timings = request.form.get('timings') == 'on'
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        if isinstance(payload.get('urls'), list):
+            urls.extend(url for url in payload['urls'] if isinstance(url, str))
+        refresh = refresh or payload.get('refresh') is True
+        timings = timings or payload.get('timings') is True
+    urls.extend(request.form.get('urls', '').splitlines())
+    url_file = request.files.get('url_file')
+    if url_file:
+        urls.extend(url_file.read().decode('utf-8', errors='replace').splitlines())
+
+    urls = read_urls(urls)
+    if not urls:
+        return jsonify(error="Please provide at least one article URL."), 400
+
+    def generate():
+        for result in scrape_batch(urls, refresh=refresh, timings=timings):
+            yield json.dumps(result) + "\n"
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/cache/stats')
+def cache_stats():
+    """Hit/miss counters and size of the result cache."""
+    cache = get_result_cache()
+    if cache is None:
+        return jsonify(enabled=False)
+    return jsonify(enabled=True, **cache.stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage timings, payload sizes and scraper counters in the Prometheus text format."""
+    tier_stats = scraper.get_tier_stats()
+    counters = {
+        'scraper_fetch_tiers_total': tier_stats['tiers'],
+        'scraper_fetch_escalations_total': tier_stats['escalations'],
+        'scraper_extraction_total': tier_stats['extraction'],
+    }
+    gauges = {'scraper_page_wait': scraper.get_wait_stats()}
+
+    job_stats = job_queue.stats()
+    counters['scraper_jobs_total'] = {key: job_stats.pop(key) for key in ('submitted', 'coalesced', 'rejected', 'done', 'error')}
+    gauges['scraper_jobs'] = job_stats
+
+    date_cache = parse_banner_date.cache_info()
+    counters['scraper_date_cache_total'] = {'hits': date_cache.hits, 'misses': date_cache.misses}
+    gauges['scraper_date_cache_size'] = date_cache.currsize
+
+    cache = get_result_cache()
+    if cache is not None:
+        cache_stats = cache.stats()
+        gauges['scraper_cache'] = {key: cache_stats.pop(key) for key in ('entries', 'bytes', 'memory_entries', 'hit_rate')}
+        counters['scraper_cache_total'] = cache_stats
+    pool_stats = scraper.get_driver_pool_stats()
+    if pool_stats is not None:
+        gauges['scraper_driver_pool'] = pool_stats
+    for mode, weight in resource_blocking.get_page_weight_stats().items():
+        gauges[f'scraper_page_weight_{mode}'] = weight
+    return Response(metrics.render_prometheus(gauges, counters), mimetype='text/plain; version=0.0.4')
 
-# Ensure the driver is closed when the Flask app exits
+# Ensure the job workers stop and the driver pool is closed when the Flask app exits
 atexit.register(close_driver)
+atexit.register(job_queue.shutdown)
 
 if __name__ == '__main__':
     # Note: Flask's reloader can cause issues with global resources like Selenium driver.
     # For development, run with use_reloader=False if you encounter issues with
     # the driver being closed and reopened unexpectedly, or multiple login prompts.
-    app.run(debug=True, use_reloader=False)
\ No newline at end of file
+    # threaded=True lets concurrent requests use separate pooled drivers.
+    app.run(debug=True, use_reloader=False, threaded=True)
\ No newline at end of file
@@ -0,0 +1,160 @@
+# batch.py
+# Scrapes many articles at once and streams one JSON line per article.
+#
+#   python batch.py urls.txt -o results.jsonl
+#   python batch.py https://www.thebaltimorebanner.com/... -o results.jsonl
+#
+# Re-running with the same output file skips URLs that already have a result
+# there; URLs that ended in an error are tried again.
+import argparse
+import contextlib
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from result_cache import normalize_url
+from scraper import POOL_SIZE, close_driver, get_driver_pool, scrape_article_data
+
+BANNER_URL_PREFIX = "https://www.thebaltimorebanner.com/"
+
+
+def read_urls(lines):
+    """
+    Cleans up a list of URLs: strips whitespace, drops blanks, # comments and
+    duplicates. URLs that differ only in ways normalize_url() ignores (host
+    case, fragment, tracking params) are duplicates; the first one is kept.
+    """
+    urls = []
+    seen = set()
+    for line in lines:
+        url = line.strip()
+        if not url or url.startswith('#'):
+            continue
+        key = normalize_url(url)
+        if key in seen:
+            continue
+        seen.add(key)
+        urls.append(url)
+    return urls
+
+
+def completed_urls(output_path):
+    """
+    Normalized URLs that already have a result line in a JSONL file from an
+    earlier run. Error lines don't count, so those URLs are scraped again.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+                if 'error' not in result:
+                    done.add(normalize_url(result['url']))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue # e.g. a line cut off when the last run was interrupted
+    return done
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _scrape_one(url, refresh=False, timings=False):
+    if not url.startswith(BANNER_URL_PREFIX):
+        return {'url': url, 'error': "Not a thebaltimorebanner.com URL."}
+    try:
+        result = scrape_article_data(url, refresh=refresh, timings=timings)
+    except Exception as e:
+        return {'url': url, 'error': f"An unexpected error occurred during scraping: {str(e)}"}
+    if "error" in result:
+        return {'url': url, 'error': result['error']}
+    return result
+
+
+def scrape_batch(urls, workers=POOL_SIZE, skip=(), refresh=False, timings=False):
+    """
+    Scrapes `urls` on `workers` threads and yields each result dict as soon as
+    it is ready, in completion order. Failed URLs yield {'url', 'error'}.
+    `skip` holds normalized URLs (see completed_urls()) to leave out.
+    refresh=True bypasses the result cache; timings=True adds each scrape's
+    stage breakdown under 'timings'.
+    Only a few URLs are in flight at a time, so large batches stay small in memory.
+    """
+    pending_urls = iter(url for url in read_urls(urls) if normalize_url(url) not in skip)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        while True:
+            while len(in_flight) < workers * 2:
+                url = next(pending_urls, None)
+                if url is None:
+                    break
+                in_flight.add(executor.submit(_scrape_one, url, refresh, timings))
+            if not in_flight:
+                return
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape many Baltimore Banner articles to JSONL.")
+    parser.add_argument('inputs', nargs='+', help="article URLs and/or files with one URL per line ('-' for stdin)")
+    parser.add_argument('-o', '--output', help="JSONL file to append to (default: stdout); URLs already scraped into it are skipped")
+    parser.add_argument('-w', '--workers', type=int, default=POOL_SIZE, help="concurrent scrapes (default: %(default)s)")
+    parser.add_argument('--refresh', action='store_true', help="ignore cached results and scrape every URL again")
+    parser.add_argument('--timings', action='store_true', help="add a per-stage timing breakdown to each result")
+    parser.add_argument('--headless', action='store_true', default=None,
+                        help="start the browser headless even if no login has been saved (skips the login prompt)")
+    args = parser.parse_args(argv)
+
+    urls = []
+    for item in args.inputs:
+        if item == '-':
+            urls.extend(sys.stdin)
+        elif os.path.isfile(item):
+            with open(item, encoding='utf-8') as f:
+                urls.extend(f)
+        else:
+            urls.append(item)
+
+    skip = completed_urls(args.output) if args.output else set()
+    if skip:
+        print(f"Resuming: skipping {len(skip)} URLs already in {args.output}", file=sys.stderr)
+
+    resuming = args.output and os.path.exists(args.output)
+    out = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    if resuming and not _ends_with_newline(args.output):
+        out.write("\n") # don't glue the first new line onto a line cut off mid-write
+    done = failed = 0
+    # the scraper logs with print(); send that to stderr so stdout carries only JSONL
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            try:
+                get_driver_pool(headless=args.headless) # login prompt happens before the batch starts
+            except Exception as e:
+                print(f"Could not start the Selenium WebDriver pool: {e}", file=sys.stderr)
+                return 2
+            for result in scrape_batch(urls, workers=args.workers, skip=skip, refresh=args.refresh, timings=args.timings):
+                out.write(json.dumps(result) + "\n")
+                out.flush() # every finished article is on disk if the run is interrupted
+                done += 1
+                failed += 'error' in result
+                print(f"[{done}] {'ERROR' if 'error' in result else 'ok'} {result['url']}", file=sys.stderr)
+        finally:
+            if args.output:
+                out.close()
+            close_driver()
+    print(f"Finished {done} articles ({failed} errors).", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,373 @@
+# benchmark.py
+# Offline benchmarks for the scraper, run against the saved article pages in
+# benchmarks/fixtures instead of the live site. Results are JSON so two runs
+# can be compared, e.g.:
+#   python benchmark.py -o baseline.json
+#   python benchmark.py --compare baseline.json   (exits 1 on a regression)
+#   python benchmark.py e2e --latency 150         (needs Chrome)
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import extractor
+import http_fetcher
+import metrics
+import textstats
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures')
+MODES = ('extract', 'text', 'e2e')
+DEFAULT_MODES = ('extract', 'text') # e2e needs Chrome, so it only runs when asked for
+
+# Date strings in every shape parse_banner_date() handles, plus one it can't parse.
+DATE_SAMPLES = [
+    "May 16, 2023, 2:42 p.m. EDT",
+    "March 2, 2023, 10:05 AM",
+    "Jan 9, 2023, 4:30PM",
+    "June 1, 2023",
+    "Sep 5, 2023",
+    "06/01/2023 9:15 AM",
+    "06/01/2023",
+    "Updated yesterday",
+]
+
+# Metrics compared by --compare. Only the steadiest statistics are used: the
+# fastest run (noise only ever adds time) and peak memory. Microbenchmark
+# rates are best-of-N too but swing more, so they get their own tolerance.
+HIGHER_IS_BETTER = ('calls_per_sec', 'uncached_calls_per_sec')
+LOWER_IS_BETTER = ('min_ms', 'peak_memory_bytes')
+MICRO_METRICS = HIGHER_IS_BETTER
+MICRO_REPEAT = 7 # timeit rounds per microbenchmark, best one counts
+
+
+def load_fixtures(names=None):
+    """Maps fixture name (file name without .html) to its HTML, in name order."""
+    fixtures = {}
+    for file_name in sorted(os.listdir(FIXTURES_DIR)):
+        name, ext = os.path.splitext(file_name)
+        if ext == '.html' and (not names or name in names):
+            with open(os.path.join(FIXTURES_DIR, file_name), encoding='utf-8') as f:
+                fixtures[name] = f.read()
+    missing = set(names or ()) - set(fixtures)
+    if missing:
+        raise ValueError(f"Unknown fixtures: {', '.join(sorted(missing))}")
+    return fixtures
+
+
+def _summary(samples):
+    """Timing summary in milliseconds for a list of durations in seconds."""
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        'runs': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'median_ms': round(pick(0.5) * 1000, 3),
+        'p95_ms': round(pick(0.95) * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3),
+    }
+
+
+def _peak_memory(fn):
+    """Peak bytes allocated by Python while fn() runs."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_extraction(fixtures, repeat):
+    """Articles/sec and peak memory of extractor.extract_article() per fixture."""
+    samples = {name: [] for name in fixtures}
+    for html in fixtures.values():
+        extractor.extract_article(html) # warm-up
+    # Round-robin over the fixtures, so each one's runs are spread over the
+    # whole benchmark instead of landing together in one slow patch.
+    for _ in range(repeat):
+        for name, html in fixtures.items():
+            started = time.perf_counter()
+            extractor.extract_article(html)
+            samples[name].append(time.perf_counter() - started)
+    results = {}
+    total_seconds = 0.0
+    for name, html in fixtures.items():
+        total_seconds += sum(samples[name])
+        results[name] = {
+            'html_bytes': len(html.encode('utf-8')),
+            'articles_per_sec': round(repeat / sum(samples[name]), 2),
+            **_summary(samples[name]),
+            # measured separately, tracemalloc slows down the timed runs
+            'peak_memory_bytes': _peak_memory(partial(extractor.extract_article, html)),
+        }
+    return {
+        'parser': extractor.HTML_PARSER,
+        'articles_per_sec': round(repeat * len(fixtures) / total_seconds, 2),
+        'fixtures': results,
+    }
+
+
+def _calls_per_sec(fn, min_seconds=0.1):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    while timer.timeit(number) < min_seconds:
+        number *= 2
+    best = min(timer.repeat(repeat=MICRO_REPEAT, number=number))
+    return round(number / best, 1)
+
+
+def bench_text(fixtures):
+    """
+    Calls/sec of count_words() and textstats.analyze() on each fixture's text,
+    and of parse_banner_date() per date shape, both through its cache of recent
+    dates and uncached.
+    """
+    count_words, analyze = {}, {}
+    for name, html in fixtures.items():
+        text = extractor.make_soup(html).get_text(' ', strip=True)
+        count_words[name] = {
+            'chars': len(text),
+            'words': extractor.count_words(text),
+            'calls_per_sec': _calls_per_sec(partial(extractor.count_words, text)),
+        }
+        analyze[name] = {
+            'sentences': textstats.analyze(text).sentences,
+            'calls_per_sec': _calls_per_sec(partial(textstats.analyze, text)),
+        }
+    parse_uncached = extractor.parse_banner_date.__wrapped__
+    parse_banner_date = {
+        date_text: {
+            'result': extractor.parse_banner_date(date_text),
+            'calls_per_sec': _calls_per_sec(partial(extractor.parse_banner_date, date_text)),
+            'uncached_calls_per_sec': _calls_per_sec(partial(parse_uncached, date_text)),
+        }
+        for date_text in DATE_SAMPLES
+    }
+    return {'count_words': count_words, 'analyze': analyze, 'parse_banner_date': parse_banner_date}
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves the fixtures directory, waiting `latency` seconds before each response."""
+
+    latency = 0.0
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(latency=0.0):
+    """Starts a local HTTP server for the fixtures on a free port. Returns (server, base URL)."""
+    handler = type('FixtureHandler', (_FixtureHandler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(handler, directory=FIXTURES_DIR))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def _stage_means(traces):
+    stages = {}
+    for trace in traces:
+        for stage, seconds in trace.stages.items():
+            stages.setdefault(stage, []).append(seconds)
+    return {stage: round(sum(samples) / len(samples) * 1000, 3) for stage, samples in stages.items()}
+
+
+def _scrape_with_driver(scraper, driver, url):
+    """The Selenium tier of scraper.scrape_article_data(), without the pool."""
+    with metrics.stage('driver_get'):
+        driver.get(url)
+    with metrics.stage('page_wait'):
+        scraper.wait_for_article_ready(driver)
+    data = scraper.extract_in_browser(driver, url)
+    if data is None:
+        with metrics.stage('page_source'):
+            page_source = driver.page_source
+        data = scraper.parse_article_html(page_source, url)
+    return data
+
+
+def _scrape_with_http(url):
+    """The HTTP tier of scraper.scrape_article_data(), without the cookies or escalation."""
+    with metrics.stage('http_fetch'):
+        response = http_fetcher.fetch(url)
+    with metrics.stage('soup_parse'):
+        soup = extractor.make_soup(response.content, http_fetcher.declared_encoding(response))
+    return extractor.extract_from_soup(soup)
+
+
+def bench_end_to_end(fixtures, repeat, latency):
+    """
+    Scrapes every fixture from a local server through a plain HTTP fetch and
+    through headless Chrome with and without resource blocking, using the same
+    page-ready wait and in-browser extraction as the scraper. Each Chrome run
+    also records its page weight, so the two blocking modes can be compared.
+    No login and no driver pool are involved.
+    """
+    # Selenium and the driver code are only needed for this mode
+    import resource_blocking
+    import scraper
+
+    server, base_url = serve_fixtures(latency)
+    profile_dirs, drivers = [], {}
+    try:
+        for tier, profile in (('selenium_blocked', resource_blocking.DEFAULT_PROFILE),
+                              ('selenium_unblocked', resource_blocking.NO_BLOCKING)):
+            profile_dirs.append(tempfile.mkdtemp(prefix='scraper-bench-'))
+            drivers[tier] = (scraper.create_driver(headless=True, blocking=profile, profile_dir=profile_dirs[-1],
+                                                   page_weight=True), profile)
+        results = {}
+        for name in fixtures:
+            url = f"{base_url}{name}.html"
+            tiers = {}
+            for tier in ('http', *drivers):
+                samples, traces, weights = [], [], []
+                driver, profile = drivers.get(tier, (None, None))
+                for _ in range(repeat):
+                    if driver is not None:
+                        resource_blocking.read_page_weight(driver) # drop traffic from earlier pages
+                    with metrics.traced() as trace:
+                        data = _scrape_with_http(url) if driver is None else _scrape_with_driver(scraper, driver, url)
+                    samples.append(time.perf_counter() - trace.started)
+                    traces.append(trace)
+                    if driver is not None:
+                        weight = resource_blocking.read_page_weight(driver)
+                        resource_blocking.record_page_weight(weight, profile.enabled)
+                        if weight:
+                            weights.append(weight)
+                tiers[tier] = {
+                    'articles_per_sec': round(len(samples) / sum(samples), 2),
+                    **_summary(samples),
+                    'stages_mean_ms': _stage_means(traces),
+                    'article_word_count': data.get('article_word_count'),
+                }
+                if weights:
+                    tiers[tier]['page_weight_mean'] = {
+                        key: round(sum(weight[key] for weight in weights) / len(weights), 1)
+                        for key in ('bytes', 'requests', 'blocked_requests')
+                    }
+            results[name] = tiers
+    finally:
+        for driver, _ in drivers.values():
+            driver.quit()
+        server.shutdown()
+        server.server_close()
+        for profile_dir in profile_dirs:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+    return {
+        'latency_ms': round(latency * 1000),
+        'page_weight': resource_blocking.get_page_weight_stats(),
+        'fixtures': results,
+    }
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(FIXTURES_DIR), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'html_parser': extractor.HTML_PARSER,
+    }
+
+
+def _flatten(results, prefix=''):
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, path + '.')
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, key, value
+
+
+def compare(results, baseline, tolerance, micro_tolerance=None):
+    """
+    Lists the metrics in `results` that are more than `tolerance` (a fraction)
+    worse than in `baseline`, or `micro_tolerance` for microbenchmark rates.
+    Metrics missing from either run are ignored.
+    """
+    micro_tolerance = tolerance if micro_tolerance is None else micro_tolerance
+    old = {path: value for path, _, value in _flatten(baseline)}
+    regressions = []
+    for path, key, new_value in _flatten(results):
+        old_value = old.get(path)
+        if not old_value or (key not in HIGHER_IS_BETTER and key not in LOWER_IS_BETTER):
+            continue
+        change = (new_value - old_value) / old_value
+        allowed = micro_tolerance if key in MICRO_METRICS else tolerance
+        if (key in HIGHER_IS_BETTER and change < -allowed) or (key in LOWER_IS_BETTER and change > allowed):
+            regressions.append(f"{path}: {old_value} -> {new_value} ({change:+.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scraper offline against saved article pages.")
+    parser.add_argument('modes', nargs='*', metavar='MODE',
+                        help=f"any of {', '.join(MODES)} (default: {' '.join(DEFAULT_MODES)})")
+    parser.add_argument('-n', '--repeat', type=int, default=30, help="timed runs per fixture (default: %(default)s)")
+    parser.add_argument('-f', '--fixture', action='append', dest='fixtures',
+                        help="only use this fixture (repeatable), e.g. long_form")
+    parser.add_argument('--latency', type=float, default=0, help="e2e: delay in ms before each local server response")
+    parser.add_argument('-o', '--output', help="write the JSON results here (default: stdout)")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON results of an earlier run to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help="allowed slowdown of min_ms and peak memory before --compare fails, as a fraction (default: %(default)s)")
+    parser.add_argument('--micro-tolerance', type=float, default=0.35,
+                        help="allowed slowdown of the text microbenchmark rates, as a fraction (default: %(default)s)")
+    args = parser.parse_args(argv)
+    unknown = [mode for mode in args.modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown mode: {', '.join(unknown)} (choose from {', '.join(MODES)})")
+
+    fixtures = load_fixtures(args.fixtures)
+    modes = args.modes or list(DEFAULT_MODES)
+    results = {'meta': _metadata()}
+    if 'extract' in modes:
+        print("Benchmarking extraction...", file=sys.stderr)
+        results['extract'] = bench_extraction(fixtures, args.repeat)
+    if 'text' in modes:
+        print("Benchmarking count_words and parse_banner_date...", file=sys.stderr)
+        results['text'] = bench_text(fixtures)
+    if 'e2e' in modes:
+        print(f"Benchmarking end to end with {args.latency:g} ms latency...", file=sys.stderr)
+        results['e2e'] = bench_end_to_end(fixtures, args.repeat, args.latency / 1000)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        baseline.pop('meta', None)
+        regressions = compare({k: v for k, v in results.items() if k != 'meta'}, baseline, args.tolerance, args.micro_tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        print(f"{len(regressions)} regressions against {args.compare}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,390 @@
+# extractor.py
+# Turns article HTML into the scraper's result dict. Nothing here touches
+# Selenium, so extraction can be run and benchmarked offline.
+from bs4 import BeautifulSoup, Tag
+import os
+import re
+from datetime import datetime
+
+import metrics
+# count_words and parse_banner_date are re-exported for existing importers
+from textstats import EMPTY_STATS, analyze, count_words, parse_banner_date
+
+# html.parser is the default: it is always available and its output is the
+# reference. SCRAPER_HTML_PARSER=lxml builds the tree faster when lxml is
+# installed, but it repairs broken markup differently (e.g. an unclosed <h1>
+# can swallow the whole article), so results can change on malformed pages.
+HTML_PARSER = os.environ.get("SCRAPER_HTML_PARSER", 'html.parser')
+
+MIN_ARTICLE_WORDS = 50 # body blocks with fewer words are not treated as the article
+
+HEADLINE_SELECTOR = 'h1.font-bold, h1[class*="headline"], header h1, h1[data-qa="Heading"]'
+BYLINE_SELECTOR = 'div[class*="Byline"], div[class*="timestamp"], p[class*="timestamp"], span[class*="timestamp"], div[class*="PageMetaData"], div.items-center.text-sm'
+NON_CONTENT_SELECTORS = ['header', 'footer', '.related-articles', '.comments'] # dropped from the 'article' fallback
+
+ARTICLE_BODY_SELECTORS = [
+    'div.rich-text__content',
+    'div.rich-text--article-body',
+    'div[data-qa="ArticleBody"]',
+    'section[data-qa="ArticleBody"]',
+    'div[class*="article-body"]',
+    'div[class*="ArticlePage-articleBody"]',
+    'article[class*="ArticlePage"] div[class*="body"]',
+    'article .entry-content',
+    'article'
+]
+
+# dates such as "May 16, 2023, 2:42 p.m. EDT" inside byline/timestamp text
+_BYLINE_DATE_RE = re.compile(r"(\w+\s+\d{1,2},\s+\d{4}(?:,\s*\d{1,2}:\d{2}\s*(?:a\.m\.|p\.m\.)(?:\s*\w+)?)?)", re.IGNORECASE)
+
+
+def build_article_data(headline_text, time_dt, byline_texts, time_texts, article_stats, figures, body_images):
+    """
+    Assembles the result dict (without 'url') from raw extracted strings, so
+    the BeautifulSoup engine and in-browser extraction share the same rules.
+
+    headline_text: the headline, or None if there is no headline.
+    time_dt: (datetime attribute, text) of the first <time datetime>, or None.
+    byline_texts, time_texts: callables returning the texts of the byline
+        containers and of every <time> tag; only called if needed.
+    article_stats: textstats.TextStats of the chosen body, or None if no body
+        block was found.
+    figures, body_images: see _set_images().
+    """
+    data = {}
+    _set_headline(data, headline_text)
+    with metrics.stage('date_parsing'):
+        data['date_posted'] = _resolve_date(time_dt, byline_texts, time_texts)
+    _set_body_stats(data, article_stats or EMPTY_STATS)
+    with metrics.stage('image_collection'):
+        _set_images(data, figures, body_images)
+    return data
+
+
+def _set_headline(data, headline_text):
+    if headline_text is not None:
+        data['headline'] = headline_text
+        data['headline_word_count'] = count_words(headline_text)
+    else:
+        data['headline'] = "N/A - Headline not found"
+        data['headline_word_count'] = 0
+
+
+def _set_body_stats(data, stats):
+    data['article_word_count'] = stats.words
+    data['article_sentence_count'] = stats.sentences
+    data['article_paragraph_count'] = stats.paragraphs
+    data['reading_time_minutes'] = stats.reading_minutes
+
+
+def _resolve_date(time_dt, byline_texts, time_texts):
+    """
+    Works out 'date_posted' from the first <time datetime>, then dates in
+    byline/timestamp containers, then the text of any <time> tag.
+    `time_dt` is a (datetime attribute, tag text) pair or None. The other two
+    are callables returning candidate texts, so they are only gathered if needed.
+    """
+    date_posted = "N/A - Date not found"
+    if time_dt:
+        date_str, date_text_content = time_dt
+        try:
+            parsed_date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+            date_posted = parsed_date.strftime('%B %d, %Y, %I:%M %p %Z')
+            metrics.record_label('date_strategy', 'time_datetime')
+        except ValueError:
+            if date_text_content:
+                parsed_dt_text = parse_banner_date(date_text_content)
+                if parsed_dt_text != date_text_content:
+                    date_posted = parsed_dt_text
+                    metrics.record_label('date_strategy', 'time_datetime_text')
+
+    if date_posted == "N/A - Date not found":
+        # Look in typical byline/metadata containers
+        for text_content in byline_texts():
+            # More specific regex for dates within these containers
+            match = _BYLINE_DATE_RE.search(text_content)
+            if match:
+                parsed_dt_text = parse_banner_date(match.group(1))
+                if parsed_dt_text != match.group(1) or "N/A" not in parsed_dt_text:
+                    date_posted = parsed_dt_text
+                    metrics.record_label('date_strategy', 'byline_regex')
+                    break
+        # Fallback to any <time> tag's text content if still not found
+        if date_posted == "N/A - Date not found":
+            for text in time_texts():
+                if text:
+                    parsed_dt_text = parse_banner_date(text)
+                    if parsed_dt_text != text or "N/A" not in parsed_dt_text :
+                        date_posted = parsed_dt_text
+                        metrics.record_label('date_strategy', 'time_text')
+                        break
+    if date_posted == "N/A - Date not found":
+        metrics.record_label('date_strategy', 'not_found')
+    return date_posted
+
+
+def _set_images(data, figures, body_images):
+    """
+    Fills 'images'/'image_count'. `figures` yields (src, alt, caption) for each
+    <figure> with an <img>; `body_images` is a callable yielding (src, alt,
+    width, height) for every <img> in the article body, or returning None when
+    no body was found. It is only used when no figure image qualifies. alt,
+    width and height are None when the attribute is missing.
+    """
+    images = []
+    found_image_srcs = set()
+    for src, alt_text, caption_text in figures:
+        if src and src.startswith('http') and src not in found_image_srcs:
+            # attempt to get a more meaningful alt text from figcaption if img alt is poor
+            alt_text = alt_text if alt_text is not None else ''
+            final_alt = alt_text
+            if (not alt_text or alt_text.lower() in ["image", "photo", "", "graphic", "illustration"]) and caption_text:
+                final_alt = caption_text
+            elif caption_text and alt_text != caption_text and alt_text.lower() not in ["image", "photo", "", "graphic", "illustration"]:
+                 final_alt = f"{alt_text} - {caption_text}"
+
+            images.append({'src': src, 'alt': final_alt if final_alt else "Article Image"})
+            found_image_srcs.add(src)
+
+    direct_images = body_images() if not images else None
+    for src, alt_text, width, height in direct_images or ():
+        if src and src.startswith('http') and src not in found_image_srcs:
+            # Add filters to avoid tiny/irrelevant images
+            width = width if width is not None else '0'
+            height = height if height is not None else '0'
+            try: # ensure width/height are digits if present
+                w, h = int(re.sub(r'\D', '', width)), int(re.sub(r'\D', '', height))
+                if w < 100 and h < 100 and (w != 0 or h != 0): # Skip small images if dimensions are known
+                    continue
+            except ValueError:
+                pass # if width/height not parsable, proceed
+
+            if any(keyword in src.lower() for keyword in ['logo', 'avatar', 'icon', 'ads', 'spinner', 'gravatar', 'pixel', 'banner/button', 'feed']):
+                continue
+
+            images.append({'src': src, 'alt': alt_text if alt_text is not None else 'Article Image'})
+            found_image_srcs.add(src)
+
+    data['images'] = images
+    data['image_count'] = len(images)
+
+
+# --- selector plan ---
+# The selectors above only use tag names, .class, [attr], [attr="v"],
+# [attr*="v"] (optionally with an " i" flag) and the descendant combinator.
+# They are compiled once into matchers indexed by tag name, so one walk over
+# the document can test each element against just the selectors that could
+# match it.
+
+_COMPOUND_RE = re.compile(r'([\w-]+)?((?:\.[\w-]+|\[[\w-]+(?:\*?="[^"]*"(?:\s+i)?)?\])*)$')
+_SIMPLE_RE = re.compile(r'\.([\w-]+)|\[([\w-]+)(?:(\*?=)"([^"]*)"(\s+i)?)?\]')
+
+
+class _Compound:
+    """One compound selector such as div.items-center.text-sm or h1[class*="x"]."""
+
+    __slots__ = ('tag', 'classes', 'attrs')
+
+    def __init__(self, text):
+        match = _COMPOUND_RE.match(text)
+        if not match or not text:
+            raise ValueError(f"Unsupported selector: {text!r}")
+        self.tag = match.group(1)
+        self.classes = []
+        self.attrs = []
+        for cls, name, op, value, icase in _SIMPLE_RE.findall(match.group(2)):
+            if cls:
+                self.classes.append(cls)
+            else:
+                icase = bool(icase)
+                self.attrs.append((name, op or None, value.lower() if icase else value, icase))
+
+    def matches(self, el):
+        if self.tag and el.name != self.tag:
+            return False
+        if self.classes:
+            classes = el.attrs.get('class') or ()
+            if isinstance(classes, str):
+                classes = classes.split()
+            for cls in self.classes:
+                if cls not in classes:
+                    return False
+        for name, op, value, icase in self.attrs:
+            actual = el.attrs.get(name)
+            if actual is None:
+                return False
+            if op is None:
+                continue
+            if isinstance(actual, list):
+                actual = ' '.join(actual)
+            if icase:
+                actual = actual.lower()
+            if op == '=' and actual != value:
+                return False
+            if op == '*=' and (not value or value not in actual):
+                return False
+        return True
+
+
+def _compile(selector_group):
+    """Compiles 'a b, c' into a list of complex selectors (lists of _Compound)."""
+    return [[_Compound(part) for part in selector.split()] for selector in selector_group.split(',')]
+
+
+def _matches(complex_selector, el):
+    if not complex_selector[-1].matches(el):
+        return False
+    i = len(complex_selector) - 2
+    node = el.parent
+    while i >= 0 and node is not None:
+        if complex_selector[i].matches(node):
+            i -= 1
+        node = node.parent
+    return i < 0
+
+
+def _build_plan():
+    plan = {}
+    def add(key, selector_group):
+        for complex_selector in _compile(selector_group):
+            plan.setdefault(complex_selector[-1].tag, []).append((key, complex_selector))
+    add('headline', HEADLINE_SELECTOR)
+    add('byline', BYLINE_SELECTOR)
+    for i, selector in enumerate(ARTICLE_BODY_SELECTORS):
+        add(i, selector)
+    wildcard = plan.pop(None, [])
+    return {tag: entries + wildcard for tag, entries in plan.items()}, wildcard
+
+_PLAN, _WILDCARD = _build_plan()
+
+
+class _Candidates:
+    """Everything extraction might need, gathered in one pass over the tree."""
+
+    def __init__(self):
+        self.first = {} # 'headline', body selector index, 'h1', 'time_dt' -> first element
+        self.bylines = []
+        self.times = []
+        self.figures = []
+        self.imgs = []
+
+
+def _scan(soup):
+    found = _Candidates()
+    first = found.first
+    for el in soup.descendants:
+        if not isinstance(el, Tag):
+            continue
+        name = el.name
+        if name == 'h1':
+            first.setdefault('h1', el)
+        elif name == 'time':
+            found.times.append(el)
+            if 'time_dt' not in first and el.attrs.get('datetime') is not None:
+                first['time_dt'] = el
+        elif name == 'figure':
+            found.figures.append(el)
+        elif name == 'img':
+            found.imgs.append(el)
+        for key, complex_selector in _PLAN.get(name, _WILDCARD):
+            if key == 'byline':
+                if (not found.bylines or found.bylines[-1] is not el) and _matches(complex_selector, el):
+                    found.bylines.append(el)
+            elif key not in first and _matches(complex_selector, el):
+                first[key] = el
+    return found
+
+
+def _inside(el, block):
+    return any(parent is block for parent in el.parents)
+
+
+def make_soup(html, encoding=None):
+    """
+    Parses page HTML (str or bytes) with HTML_PARSER. For bytes, `encoding` is
+    the charset declared by the server, if any; otherwise <meta charset> and
+    sniffing decide.
+    """
+    return BeautifulSoup(html, HTML_PARSER, from_encoding=encoding)
+
+
+def extract_article(html):
+    """
+    Extracts headline, date, word count and images from article HTML (str or
+    bytes). Returns the scraper's result dict without the 'url' key.
+    """
+    with metrics.stage('soup_parse'):
+        soup = make_soup(html)
+    return extract_from_soup(soup)
+
+
+def extract_from_soup(soup):
+    """Like extract_article(), for an already parsed document."""
+    with metrics.stage('candidate_scan'):
+        found = _scan(soup)
+
+    headline_tag = found.first.get('headline') or found.first.get('h1')
+    headline_text = headline_tag.get_text(strip=True) if headline_tag is not None else None
+    time_tag_dt = found.first.get('time_dt')
+    time_dt = None
+    if time_tag_dt is not None and time_tag_dt.get('datetime'):
+        time_dt = (time_tag_dt['datetime'], time_tag_dt.get_text(strip=True))
+    byline_texts = lambda: [container.get_text(" ", strip=True) for container in found.bylines]
+    time_texts = lambda: [t_tag.get_text(strip=True) for t_tag in found.times]
+
+    with metrics.stage('body_selection'):
+        article_stats, text_extraction_block = None, None
+        for i, selector in enumerate(ARTICLE_BODY_SELECTORS):
+            block = found.first.get(i)
+            if block is None:
+                continue
+            # filter out known non-content blocks if using a broad selector like 'article'
+            if selector == 'article':
+                # the date fallbacks must see the page as it was before decomposing
+                bylines_before, times_before = byline_texts(), time_texts()
+                byline_texts, time_texts = (lambda: bylines_before), (lambda: times_before)
+                for non_content_selector in NON_CONTENT_SELECTORS:
+                    for el in block.select(non_content_selector):
+                        el.decompose() # remove these parts before getting text
+            temp_text = block.get_text(separator=' ', strip=True)
+            stats = analyze(temp_text) # words, sentences and reading time in one pass
+            if stats.words > MIN_ARTICLE_WORDS: # Require a reasonable amount of text
+                article_stats = stats._replace(paragraphs=_paragraph_count(block))
+                text_extraction_block = block
+                break
+    metrics.record_label('body_selector', selector if text_extraction_block is not None else 'none')
+
+    # figures/images inside decomposed non-content blocks are gone from the tree
+    figures = [fig for fig in found.figures if not fig.decomposed]
+    if text_extraction_block is not None:
+        figures = [fig for fig in figures if _inside(fig, text_extraction_block)]
+
+    return build_article_data(
+        headline_text,
+        time_dt,
+        byline_texts,
+        time_texts,
+        article_stats,
+        _figure_candidates(figures),
+        lambda: _body_image_candidates(text_extraction_block, found.imgs) if text_extraction_block is not None else None,
+    )
+
+
+def _paragraph_count(block):
+    """Number of <p> elements with text in the body block, at least 1."""
+    return max(1, sum(1 for p in block.find_all('p') if next(p.stripped_strings, None) is not None))
+
+
+def _figure_candidates(figures):
+    for fig in figures:
+        img_tag = fig.find('img')
+        if img_tag:
+            figcaption_tag = fig.find('figcaption')
+            caption_text = figcaption_tag.get_text(strip=True) if figcaption_tag else ''
+            yield img_tag.get('src') or img_tag.get('data-src'), img_tag.get('alt'), caption_text # check data-src for lazy loading
+
+
+def _body_image_candidates(block, imgs):
+    for img_tag in imgs:
+        if not img_tag.decomposed and _inside(img_tag, block):
+            yield img_tag.get('src') or img_tag.get('data-src'), img_tag.get('alt'), img_tag.get('width'), img_tag.get('height')
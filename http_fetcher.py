@@ -0,0 +1,109 @@
+# http_fetcher.py
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# Same user agent the Selenium drivers use, so the site sees one kind of client.
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+HTTP_TIMEOUT = float(os.environ.get("SCRAPER_HTTP_TIMEOUT", "10"))
+HTTP_POOL_MAXSIZE = int(os.environ.get("SCRAPER_HTTP_POOL_MAXSIZE", "10"))
+
+_session = None # shared keep-alive session
+_session_lock = threading.Lock()
+_loaded_cookies = None # the Selenium cookie list last copied into the session
+
+
+def get_session():
+    """Gets the shared requests.Session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_MAXSIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+            })
+            _session = session
+    return _session
+
+
+def load_selenium_cookies(cookies):
+    """
+    Copies cookies exported by WebDriver.get_cookies() into the shared session.
+    Does nothing if this exact cookie list was already loaded.
+    """
+    global _loaded_cookies
+    if cookies is None or cookies is _loaded_cookies:
+        return
+    session = get_session()
+    with _session_lock:
+        for cookie in cookies:
+            session.cookies.set(
+                cookie['name'],
+                cookie['value'],
+                domain=cookie.get('domain'),
+                path=cookie.get('path', '/'),
+                secure=cookie.get('secure', False),
+                expires=cookie.get('expiry'),
+            )
+        _loaded_cookies = cookies
+
+
+def fetch(url, timeout=HTTP_TIMEOUT):
+    """
+    GETs a URL with the shared session and returns the requests.Response.
+    Raises requests.RequestException on network errors and HTTP error statuses.
+    """
+    response = get_session().get(url, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+
+def is_not_modified(url, etag=None, last_modified=None, timeout=HTTP_TIMEOUT):
+    """
+    Sends a conditional GET with If-None-Match / If-Modified-Since and returns
+    True if the site answered 304 Not Modified. The body of a 200 is not read.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    if not headers:
+        return False
+    try:
+        with get_session().get(url, headers=headers, timeout=timeout, stream=True) as response:
+            return response.status_code == 304
+    except requests.RequestException as e:
+        print(f"Conditional request failed for {url}: {e}")
+        return False
+
+
+def validators(response):
+    """The (ETag, Last-Modified) headers of a response, for later revalidation."""
+    return response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+
+def declared_encoding(response):
+    """
+    The charset from the Content-Type header, or None. Unlike response.encoding
+    this does not fall back to ISO-8859-1, so the page's <meta charset> is used.
+    """
+    if 'charset' in response.headers.get('Content-Type', '').lower():
+        return response.encoding
+    return None
+
+
+def close_session():
+    global _session, _loaded_cookies
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _loaded_cookies = None
@@ -0,0 +1,160 @@
+# jobs.py
+# Background scrape jobs, so web requests return right away instead of
+# holding a Flask worker for the whole scrape.
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from result_cache import normalize_url
+from scraper import POOL_SIZE, scrape_article_data
+
+JOB_QUEUE_SIZE = int(os.environ.get("SCRAPER_JOB_QUEUE_SIZE", "50")) # queued + running jobs
+JOB_HISTORY = int(os.environ.get("SCRAPER_JOB_HISTORY", "500")) # finished jobs kept for polling
+
+FINISHED_STATUSES = ('done', 'error')
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit() when too many jobs are already waiting."""
+
+
+class Job:
+    def __init__(self, url, refresh=False, timings=False):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.refresh = refresh
+        self.timings = timings # include the scrape's stage breakdown in the result
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.version = 0 # bumped on every status change, for subscribers
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self):
+        now = time.time()
+        started = self.started_at or now
+        timings = {'queued_seconds': round(started - self.created_at, 3)}
+        if self.started_at:
+            timings['run_seconds'] = round((self.finished_at or now) - self.started_at, 3)
+        if self.finished_at:
+            timings['total_seconds'] = round(self.finished_at - self.created_at, 3)
+        return {
+            'id': self.id,
+            'url': self.url,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'timings': timings,
+        }
+
+
+class JobQueue:
+    """
+    Runs scrape jobs on a thread pool sized to the WebDriver pool. At most
+    `capacity` jobs can be queued or running; submit() raises QueueFull past
+    that. A URL that already has an unfinished job with the same options gets
+    that job back instead of a second scrape; a refresh is never answered by a
+    job that may serve a cached result.
+    """
+
+    def __init__(self, scrape=scrape_article_data, workers=POOL_SIZE, capacity=JOB_QUEUE_SIZE, history=JOB_HISTORY):
+        self.scrape = scrape
+        self.capacity = capacity
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scrape-job')
+        self._cond = threading.Condition()
+        self._jobs = OrderedDict() # job id -> Job, oldest first
+        self._active = {} # (normalized URL, refresh, timings) -> unfinished Job
+        self._counts = {'submitted': 0, 'coalesced': 0, 'rejected': 0, 'done': 0, 'error': 0}
+
+    def submit(self, url, refresh=False, timings=False):
+        """Queues a scrape of `url`. Returns (job, created); created is False for a shared job."""
+        key = (normalize_url(url), refresh, timings)
+        with self._cond:
+            job = self._active.get(key)
+            if job is not None:
+                self._counts['coalesced'] += 1
+                return job, False
+            if len(self._active) >= self.capacity:
+                self._counts['rejected'] += 1
+                raise QueueFull(f"{len(self._active)} scrape jobs are already waiting.")
+            job = Job(url, refresh, timings)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._counts['submitted'] += 1
+            self._trim_history()
+        self._executor.submit(self._run, job, key)
+        return job, True
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def snapshot(self, job_id):
+        """The job as a dict, or None if there is no such job."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def wait_for_change(self, job_id, version, timeout=None):
+        """
+        Blocks until the job's version differs from `version` or `timeout`
+        seconds pass. Returns (job dict, version), or (None, version) on timeout.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None, version
+            if job.version == version:
+                self._cond.wait_for(lambda: job.version != version, timeout)
+            if job.version == version:
+                return None, version
+            return job.to_dict(), job.version
+
+    def stats(self):
+        with self._cond:
+            counts = dict(self._counts)
+            counts['active'] = len(self._active)
+            counts['running'] = sum(1 for job in self._active.values() if job.status == 'running')
+            counts['capacity'] = self.capacity
+        return counts
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job, key):
+        self._update(job, status='running', started_at=time.time())
+        try:
+            result = self.scrape(job.url, refresh=job.refresh, timings=job.timings)
+        except Exception as e:
+            result = {"error": f"An unexpected error occurred during scraping: {str(e)}"}
+        finished = {'finished_at': time.time()}
+        if "error" in result:
+            finished.update(status='error', error=result["error"])
+        else:
+            finished.update(status='done', result=result)
+        with self._cond:
+            self._active.pop(key, None)
+            self._counts[finished['status']] += 1
+        self._update(job, **finished)
+
+    def _update(self, job, **fields):
+        with self._cond:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._cond.notify_all()
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
@@ -0,0 +1,154 @@
+# metrics.py
+# Lightweight per-scrape instrumentation. Code records into the trace of the
+# scrape running in the current thread (if any) with stage(), record_size()
+# and record_label(); finish_trace() folds the trace into process-wide
+# histograms and counters that render_prometheus() exposes for /metrics.
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+_current_trace = contextvars.ContextVar('scrape_trace', default=None)
+
+
+class Trace:
+    """Timings (seconds), sizes (bytes) and labels gathered during one scrape."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.sizes = {}
+        self.labels = {}
+
+    def to_dict(self):
+        return {
+            'total_seconds': round(time.perf_counter() - self.started, 4),
+            'stages': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'sizes': dict(self.sizes),
+            **self.labels,
+        }
+
+
+@contextmanager
+def stage(name):
+    """Times the enclosed block as `name` in the current trace. A no-op outside a trace."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.stages[name] = trace.stages.get(name, 0.0) + time.perf_counter() - started
+
+
+def record_size(name, value):
+    """Records a payload size; str values are measured as UTF-8 bytes."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.sizes[name] = len(value.encode('utf-8')) if isinstance(value, str) else len(value)
+
+
+def record_label(name, value):
+    """Records which variant of something was used, e.g. the body selector that won."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.labels[name] = value
+
+
+def start_trace():
+    trace = Trace()
+    return trace, _current_trace.set(trace)
+
+
+def finish_trace(trace, token):
+    _current_trace.reset(token)
+    with _lock:
+        _observe(_stage_seconds, 'total', time.perf_counter() - trace.started, STAGE_BUCKETS)
+        for name, seconds in trace.stages.items():
+            _observe(_stage_seconds, name, seconds, STAGE_BUCKETS)
+        for name, size in trace.sizes.items():
+            _observe(_size_bytes, name, size, SIZE_BUCKETS)
+        for name, value in trace.labels.items():
+            key = (name, str(value))
+            _label_counts[key] = _label_counts.get(key, 0) + 1
+
+
+@contextmanager
+def traced():
+    """Runs the enclosed block in a new trace and yields it."""
+    trace, token = start_trace()
+    try:
+        yield trace
+    finally:
+        finish_trace(trace, token)
+
+
+# --- aggregation ---
+
+_lock = threading.Lock()
+_stage_seconds = {} # stage -> [bucket counts..., sum, count]
+_size_bytes = {}
+_label_counts = {} # (label name, value) -> count
+
+
+def _observe(histograms, name, value, buckets):
+    histogram = histograms.get(name)
+    if histogram is None:
+        histogram = histograms[name] = [0] * len(buckets) + [0.0, 0]
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            histogram[i] += 1
+    histogram[-2] += value
+    histogram[-1] += 1
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _render_histogram(lines, metric, label, histograms, buckets, help_text):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} histogram")
+    for name, histogram in sorted(histograms.items()):
+        for bound, count in zip(buckets, histogram):
+            lines.append(f'{metric}_bucket{{{label}="{_escape(name)}",le="{bound:g}"}} {count}')
+        lines.append(f'{metric}_bucket{{{label}="{_escape(name)}",le="+Inf"}} {histogram[-1]}')
+        lines.append(f'{metric}_sum{{{label}="{_escape(name)}"}} {histogram[-2]}')
+        lines.append(f'{metric}_count{{{label}="{_escape(name)}"}} {histogram[-1]}')
+
+
+def _render_values(lines, metric_type, values):
+    for metric, value in sorted((values or {}).items()):
+        lines.append(f"# TYPE {metric} {metric_type}")
+        if isinstance(value, dict):
+            for key, number in sorted(value.items()):
+                lines.append(f'{metric}{{key="{_escape(key)}"}} {number}')
+        else:
+            lines.append(f"{metric} {value}")
+
+
+def render_prometheus(gauges=None, counters=None):
+    """
+    The collected metrics in the Prometheus text format. `gauges` and `counters`
+    map extra metric names to a number or to a {label value: number} dict
+    (labelled 'key'). Counters are values that only go up; by convention their
+    names end in _total.
+    """
+    lines = []
+    with _lock:
+        _render_histogram(lines, 'scraper_stage_seconds', 'stage', _stage_seconds, STAGE_BUCKETS,
+                          "Time spent per scrape stage.")
+        _render_histogram(lines, 'scraper_payload_bytes', 'payload', _size_bytes, SIZE_BUCKETS,
+                          "Size of HTML and extraction payloads per scrape.")
+        lines.append("# HELP scraper_choice_total How often each selector, strategy or tier was used.")
+        lines.append("# TYPE scraper_choice_total counter")
+        for (name, value), count in sorted(_label_counts.items()):
+            lines.append(f'scraper_choice_total{{choice="{_escape(name)}",value="{_escape(value)}"}} {count}')
+    _render_values(lines, 'counter', counters)
+    _render_values(lines, 'gauge', gauges)
+    return "\n".join(lines) + "\n"
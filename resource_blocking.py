@@ -0,0 +1,151 @@
+# resource_blocking.py
+# Keeps Chrome from downloading what the scraper never looks at: image pixels
+# (we only read src/alt), web fonts, media, ads and analytics. Blocking is done
+# with Chrome preferences where one exists and with the DevTools
+# Network.setBlockedURLs command for everything else.
+import json
+import os
+import threading
+
+from selenium.common.exceptions import WebDriverException
+
+# URL patterns for Network.setBlockedURLs; '*' matches any run of characters.
+RESOURCE_TYPE_PATTERNS = {
+    'image': ['*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.avif*', '*.ico*'],
+    'font': ['*.woff*', '*.ttf*', '*.otf*', '*.eot*', '*fonts.googleapis.com*', '*fonts.gstatic.com*'],
+    'media': ['*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*', '*.m4a*'],
+    'stylesheet': ['*.css*'],
+}
+
+DEFAULT_BLOCK_TYPES = ['image', 'font', 'media']
+
+DEFAULT_DENY_DOMAINS = [
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com', 'google-analytics.com',
+    'googletagmanager.com', 'googletagservices.com', 'adservice.google.com', 'amazon-adsystem.com',
+    'adnxs.com', 'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com', 'facebook.net',
+    'connect.facebook.net', 'scorecardresearch.com', 'quantserve.com', 'chartbeat.com', 'chartbeat.net',
+    'hotjar.com', 'newrelic.com', 'nr-data.net', 'segment.io', 'segment.com', 'parsely.com',
+    'moatads.com', 'pubmatic.com', 'rubiconproject.com', 'openx.net', 'casalemedia.com',
+]
+
+
+def _env_list(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class BlockingProfile:
+    """
+    What a driver should not download. `block_types` are keys of
+    RESOURCE_TYPE_PATTERNS and `deny_domains` are host names (subdomains
+    included). `allow_types` and `allow_domains` take precedence: an allowed
+    domain is never put on the deny list, and an allowed type is never blocked.
+    DevTools blocking has no per-domain exceptions, so type blocking applies
+    to every domain, including allowed ones.
+    """
+
+    def __init__(self, enabled=True, block_types=DEFAULT_BLOCK_TYPES, deny_domains=DEFAULT_DENY_DOMAINS,
+                 allow_types=(), allow_domains=()):
+        unknown = set(block_types) - set(RESOURCE_TYPE_PATTERNS)
+        if unknown:
+            raise ValueError(f"Unknown resource types to block: {', '.join(sorted(unknown))}")
+        self.enabled = enabled
+        self.block_types = [t for t in block_types if t not in allow_types]
+        self.deny_domains = [d for d in deny_domains if not any(d == a or d.endswith('.' + a) for a in allow_domains)]
+
+    @classmethod
+    def from_env(cls):
+        """SCRAPER_BLOCK_RESOURCES, SCRAPER_BLOCK_TYPES, SCRAPER_DENY_DOMAINS, SCRAPER_ALLOW_TYPES, SCRAPER_ALLOW_DOMAINS."""
+        return cls(
+            enabled=os.environ.get("SCRAPER_BLOCK_RESOURCES", "1") != "0",
+            block_types=_env_list("SCRAPER_BLOCK_TYPES", DEFAULT_BLOCK_TYPES),
+            deny_domains=DEFAULT_DENY_DOMAINS + _env_list("SCRAPER_DENY_DOMAINS", []),
+            allow_types=_env_list("SCRAPER_ALLOW_TYPES", []),
+            allow_domains=_env_list("SCRAPER_ALLOW_DOMAINS", []),
+        )
+
+    def url_patterns(self):
+        if not self.enabled:
+            return []
+        patterns = []
+        for resource_type in self.block_types:
+            patterns.extend(RESOURCE_TYPE_PATTERNS[resource_type])
+        for domain in self.deny_domains:
+            patterns.append(f"*://{domain}/*")
+            patterns.append(f"*.{domain}/*")
+        return patterns
+
+    def chrome_prefs(self):
+        """Preferences for ChromeOptions; must be set before the browser starts."""
+        if not self.enabled or 'image' not in self.block_types:
+            return {}
+        return {'profile.managed_default_content_settings.images': 2}
+
+    def apply(self, driver):
+        """Installs the URL blocklist on a running driver through DevTools."""
+        patterns = self.url_patterns()
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        except WebDriverException as e:
+            print(f"Could not apply resource blocking: {e}")
+
+
+DEFAULT_PROFILE = BlockingProfile.from_env()
+NO_BLOCKING = BlockingProfile(enabled=False)
+
+
+# --- page weight ---
+# Drivers are started with Chrome's performance log turned on, which carries
+# the DevTools network events. Reading the log after a page both measures the
+# bytes it pulled over the network and clears the log for the next page.
+
+def read_page_weight(driver):
+    """
+    Sums the network traffic logged since the last call.
+    Returns {'bytes', 'requests', 'blocked_requests'}, or None if the driver
+    has no performance log.
+    """
+    try:
+        entries = driver.get_log('performance')
+    except WebDriverException:
+        return None
+    weight = {'bytes': 0, 'requests': 0, 'blocked_requests': 0}
+    for entry in entries:
+        message = json.loads(entry['message'])['message']
+        method = message.get('method')
+        if method == 'Network.loadingFinished':
+            weight['bytes'] += int(message['params'].get('encodedDataLength', 0))
+            weight['requests'] += 1
+        elif method == 'Network.loadingFailed' and message['params'].get('blockedReason'):
+            weight['blocked_requests'] += 1
+    return weight
+
+
+_page_weights = {} # 'blocked' / 'unblocked' -> running totals
+_page_weights_lock = threading.Lock()
+
+def record_page_weight(weight, blocking_enabled):
+    if weight is None:
+        return
+    mode = 'blocked' if blocking_enabled else 'unblocked'
+    with _page_weights_lock:
+        totals = _page_weights.setdefault(mode, {'pages': 0, 'bytes': 0, 'requests': 0, 'blocked_requests': 0})
+        totals['pages'] += 1
+        for key in ('bytes', 'requests', 'blocked_requests'):
+            totals[key] += weight[key]
+
+
+def get_page_weight_stats():
+    """Per-page averages of bytes and requests, with and without blocking."""
+    with _page_weights_lock:
+        stats = {}
+        for mode, totals in _page_weights.items():
+            pages = totals['pages']
+            stats[mode] = dict(totals, bytes_per_page=totals['bytes'] / pages,
+                               requests_per_page=totals['requests'] / pages)
+    if 'blocked' in stats and 'unblocked' in stats and stats['unblocked']['bytes_per_page']:
+        stats['bytes_saved_ratio'] = 1 - stats['blocked']['bytes_per_page'] / stats['unblocked']['bytes_per_page']
+    return stats
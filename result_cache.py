@@ -0,0 +1,180 @@
+# result_cache.py
+# Two-tier cache for scrape results: an in-memory LRU in front of a SQLite
+# file, keyed by normalized article URL. Entries carry a TTL and the ETag /
+# Last-Modified validators of the page so stale entries can be revalidated
+# with a conditional request instead of a fresh render.
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+CACHE_ENABLED = os.environ.get("SCRAPER_CACHE", "1") != "0"
+CACHE_PATH = os.environ.get("SCRAPER_CACHE_PATH", os.path.join(_HERE, "scrape_cache.sqlite3"))
+CACHE_TTL = float(os.environ.get("SCRAPER_CACHE_TTL", str(6 * 60 * 60)))
+# results that look incomplete (no headline, too short a body) are only kept
+# briefly, in case a logged-out session or a slow paywall caused them
+CACHE_INCOMPLETE_TTL = float(os.environ.get("SCRAPER_CACHE_INCOMPLETE_TTL", "300"))
+CACHE_MEMORY_ENTRIES = int(os.environ.get("SCRAPER_CACHE_MEMORY_ENTRIES", "256"))
+CACHE_MAX_BYTES = int(os.environ.get("SCRAPER_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# query parameters that never change the article a URL points to
+_TRACKING_PARAMS = ('utm_', 'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'cmpid')
+
+CacheEntry = namedtuple('CacheEntry', 'data etag last_modified expires_at')
+
+
+def normalize_url(url):
+    """Cache key for a URL: lower-case host, no fragment, no tracking params, sorted query."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or '/', urlencode(query), ''))
+
+
+def is_fresh(entry):
+    return entry.expires_at > time.time()
+
+
+class ResultCache:
+    """
+    get()/put() scrape results by normalized URL. Expired entries are still
+    returned by get() so the caller can revalidate them; check is_fresh().
+    The SQLite file is trimmed to `max_bytes` by evicting the least recently
+    used entries.
+    """
+
+    def __init__(self, path=CACHE_PATH, memory_entries=CACHE_MEMORY_ENTRIES, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._counts = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stale': 0,
+                        'revalidated': 0, 'bypassed': 0, 'stores': 0, 'evictions': 0}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " url TEXT PRIMARY KEY, data TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+            " expires_at REAL NOT NULL, last_access REAL NOT NULL, size INTEGER NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+        self._db.commit()
+
+    def get(self, url):
+        key = normalize_url(url)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._counts['memory_hits' if is_fresh(entry) else 'stale'] += 1
+                return entry
+
+            row = self._db.execute(
+                "SELECT data, etag, last_modified, expires_at FROM results WHERE url = ?", (key,)).fetchone()
+            if row is None:
+                self._counts['misses'] += 1
+                return None
+            entry = CacheEntry(json.loads(row[0]), row[1], row[2], row[3])
+            self._db.execute("UPDATE results SET last_access = ? WHERE url = ?", (time.time(), key))
+            self._db.commit()
+            self._remember(key, entry)
+            self._counts['disk_hits' if is_fresh(entry) else 'stale'] += 1
+            return entry
+
+    def put(self, url, data, etag=None, last_modified=None, ttl=None):
+        key = normalize_url(url)
+        now = time.time()
+        entry = CacheEntry(data, etag, last_modified, now + (self.ttl if ttl is None else ttl))
+        blob = json.dumps(data)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (url, data, etag, last_modified, expires_at, last_access, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, blob, etag, last_modified, entry.expires_at, now, len(blob)))
+            self._evict()
+            self._db.commit()
+            self._remember(key, entry)
+            self._counts['stores'] += 1
+        return entry
+
+    def touch(self, url, ttl=None):
+        """Starts a new TTL for an entry, e.g. after the site answered 304 Not Modified."""
+        key = normalize_url(url)
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._db.execute("UPDATE results SET expires_at = ?, last_access = ? WHERE url = ?",
+                             (expires_at, time.time(), key))
+            self._db.commit()
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory[key] = entry._replace(expires_at=expires_at)
+
+    def record(self, event):
+        """Counts a cache event decided by the caller ('revalidated', 'bypassed')."""
+        with self._lock:
+            self._counts[event] += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            counts = dict(self._counts)
+        lookups = counts['memory_hits'] + counts['disk_hits'] + counts['misses'] + counts['stale']
+        hits = counts['memory_hits'] + counts['disk_hits'] + counts['revalidated']
+        counts.update({
+            'entries': entries,
+            'bytes': size,
+            'memory_entries': len(self._memory),
+            'hit_rate': hits / lookups if lookups else 0.0,
+        })
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        (size,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+        if size <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT url, size FROM results ORDER BY last_access").fetchall()
+        for key, entry_size in rows:
+            if size <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM results WHERE url = ?", (key,))
+            self._memory.pop(key, None)
+            size -= entry_size
+            self._counts['evictions'] += 1
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache():
+    """Gets the shared result cache, or None if caching is turned off."""
+    global _result_cache
+    if not CACHE_ENABLED:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache()
+    return _result_cache
@@ -2,258 +2,805 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import (
+    InvalidSessionIdException, SessionNotCreatedException, TimeoutException, WebDriverException,
+)
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
-import re
-from datetime import datetime
+import requests
+import http_fetcher
+from result_cache import CACHE_INCOMPLETE_TTL, get_result_cache, is_fresh
+import resource_blocking
+import metrics
+from textstats import analyze
+# count_words and parse_banner_date are re-exported for existing importers
+from extractor import (
+    ARTICLE_BODY_SELECTORS, BYLINE_SELECTOR, HEADLINE_SELECTOR, MIN_ARTICLE_WORDS, NON_CONTENT_SELECTORS,
+    build_article_data, count_words, extract_article, extract_from_soup, make_soup, parse_banner_date,
+)
+import json
+import os
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import time
 
-def count_words(text):
-    if not text:
-        return 0
-    words = re.findall(r'\b\w+\b', text.lower())
-    return len(words)
-
-def parse_banner_date(date_text):
-    if not date_text or date_text.strip().lower() == "n/a - date not found":
-        return "N/A - Date not found"
-    date_text_normalized = date_text.replace("a.m.", "AM").replace("p.m.", "PM").strip()
-    tz_pattern = r'\b(EDT|EST|CDT|CST|MDT|MST|PDT|PST)\b'
-    tz_match = re.search(tz_pattern, date_text_normalized)
-    tz_suffix = ""
-    if tz_match:
-        tz_suffix = " " + tz_match.group(1)
-        date_text_normalized = re.sub(tz_pattern, "", date_text_normalized).strip()
-    formats_to_try = [
-        "%B %d, %Y, %I:%M %p", "%B %d, %Y, %I:%M%p",
-        "%b %d, %Y, %I:%M %p", "%b %d, %Y, %I:%M%p",
-        "%B %d, %Y", "%b %d, %Y",
-        "%m/%d/%Y %I:%M %p", "%m/%d/%Y",
-    ]
-    for fmt in formats_to_try:
-        try:
-            dt_obj = datetime.strptime(date_text_normalized, fmt)
-            return dt_obj.strftime('%B %d, %Y, %I:%M %p') + tz_suffix
-        except ValueError:
-            continue
-    return date_text
+BANNER_HOME_URL = "https://www.thebaltimorebanner.com/"
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# The login driver keeps its Chrome profile here, so the Banner session
+# survives restarts. Once a login has been saved the login driver starts
+# headless. SCRAPER_HEADLESS=1/0 forces headless or visible.
+CHROME_PROFILE_DIR = os.environ.get("SCRAPER_CHROME_PROFILE_DIR", os.path.join(_HERE, ".chrome-profile"))
+LOGIN_MARKER_FILE = os.path.join(CHROME_PROFILE_DIR, "scraper-login-saved")
+HEADLESS = {"1": True, "0": False}.get(os.environ.get("SCRAPER_HEADLESS", ""))
+
+# Path of a chromedriver binary to use as-is. Otherwise the path that
+# ChromeDriverManager installed to is remembered in CHROMEDRIVER_CACHE_FILE,
+# so later starts skip its network lookup.
+CHROMEDRIVER_PATH = os.environ.get("SCRAPER_CHROMEDRIVER_PATH")
+CHROMEDRIVER_CACHE_FILE = os.environ.get("SCRAPER_CHROMEDRIVER_CACHE", os.path.join(_HERE, ".chromedriver-path"))
+
+# Pool settings, overridable from the environment so the Flask app can be tuned
+# without code changes.
+POOL_SIZE = int(os.environ.get("SCRAPER_POOL_SIZE", "3"))
+POOL_MAX_PAGES_PER_DRIVER = int(os.environ.get("SCRAPER_MAX_PAGES_PER_DRIVER", "50"))
+POOL_ACQUIRE_TIMEOUT = float(os.environ.get("SCRAPER_POOL_ACQUIRE_TIMEOUT", "60"))
+
+# Page readiness settings. "eager" makes driver.get() return at DOMContentLoaded
+# instead of waiting for every image and ad; wait_for_article_ready() then
+# waits only for the markup extraction needs, up to PAGE_READY_TIMEOUT seconds.
+PAGE_LOAD_STRATEGY = os.environ.get("SCRAPER_PAGE_LOAD_STRATEGY", "eager")
+PAGE_READY_TIMEOUT = float(os.environ.get("SCRAPER_PAGE_READY_TIMEOUT", "10"))
+PAGE_READY_POLL = float(os.environ.get("SCRAPER_PAGE_READY_POLL", "0.1"))
+PAYWALL_SETTLE_SECONDS = float(os.environ.get("SCRAPER_PAYWALL_SETTLE_SECONDS", "0.3"))
+# how long after the page finished loading scripts still get to add the body
+# and h1; after that a page missing them is taken as not being an article
+PAGE_COMPLETE_GRACE_SECONDS = float(os.environ.get("SCRAPER_PAGE_COMPLETE_GRACE_SECONDS", "3"))
+
+# Try a plain HTTP GET (with the logged-in cookies) before rendering in Chrome.
+HTTP_FAST_PATH = os.environ.get("SCRAPER_HTTP_FAST_PATH", "1") != "0"
+
+# Run the extraction selectors inside the page with execute_script, falling
+# back to parsing driver.page_source when that result is incomplete.
+BROWSER_EXTRACTION = os.environ.get("SCRAPER_BROWSER_EXTRACTION", "1") != "0"
+
+# Log DevTools network events so every Selenium page's transfer size is
+# recorded (see resource_blocking.get_page_weight_stats()). Off by default:
+# the performance log ships every network event through the WebDriver
+# connection. `python benchmark.py e2e` measures both blocking modes anyway.
+MEASURE_PAGE_WEIGHT = os.environ.get("SCRAPER_MEASURE_PAGE_WEIGHT", "0") == "1"
 
+PAYWALL_SELECTOR = '[class*="paywall" i], [id*="paywall" i], [data-qa*="paywall" i], [class*="regwall" i]'
 
-_driver_instance = None # vraible to hoold website driver instance
 
-def get_or_create_driver(headless=False, force_recreate=False):
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def get_chromedriver_path(refresh=False):
     """
-    Gets the existing Selenium WebDriver instance or creates a new one.
-    The Flask app will call this.
+    Finds the chromedriver binary: SCRAPER_CHROMEDRIVER_PATH, else the path
+    cached by an earlier run, else ChromeDriverManager (which is then cached).
+    refresh=True ignores the cache, e.g. after Chrome updated itself.
     """
-    global _driver_instance
-    if force_recreate and _driver_instance:
-        _driver_instance.quit()
-        _driver_instance = None
-
-    if _driver_instance is None:
-        print("Initializing Selenium WebDriver...")
-        chrome_options = ChromeOptions()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-        
-        try:
-            service = ChromeService(ChromeDriverManager().install())
-            _driver_instance = webdriver.Chrome(service=service, options=chrome_options)
-            print("Selenium WebDriver initialized.")
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if refresh or _chromedriver_path is None:
+            path = CHROMEDRIVER_PATH
+            if not path and not refresh and os.path.exists(CHROMEDRIVER_CACHE_FILE):
+                try:
+                    with open(CHROMEDRIVER_CACHE_FILE, encoding='utf-8') as f:
+                        path = f.read().strip()
+                except OSError:
+                    path = None
+                if path and not os.path.isfile(path):
+                    path = None
+            if not path:
+                print("Looking up chromedriver with ChromeDriverManager...")
+                path = ChromeDriverManager().install()
+                try:
+                    with open(CHROMEDRIVER_CACHE_FILE, 'w', encoding='utf-8') as f:
+                        f.write(path)
+                except OSError as e: # e.g. a read-only install; this process still has it
+                    print(f"Could not cache the chromedriver path in {CHROMEDRIVER_CACHE_FILE}: {e}")
+            _chromedriver_path = path
+    return _chromedriver_path
+
+
+def create_driver(headless=False, blocking=None, profile_dir=None, page_weight=None):
+    """
+    Starts a Chrome WebDriver with the scraper's standard options. `blocking`
+    is a resource_blocking.BlockingProfile to apply, or None to load everything.
+    `profile_dir` is a Chrome user-data-dir to keep between runs; only one
+    running browser can use a given directory. `page_weight` turns on the
+    performance log read by resource_blocking.read_page_weight(); None
+    defers to MEASURE_PAGE_WEIGHT.
+    """
+    chrome_options = ChromeOptions()
+    chrome_options.page_load_strategy = PAGE_LOAD_STRATEGY
+    prefs = blocking.chrome_prefs() if blocking is not None else {}
+    if prefs:
+        chrome_options.add_experimental_option('prefs', prefs)
+    if page_weight is None:
+        page_weight = MEASURE_PAGE_WEIGHT
+    if page_weight:
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    if headless:
+        chrome_options.add_argument("--headless=new")
+    if profile_dir:
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument(f"user-agent={http_fetcher.USER_AGENT}")
+    try:
+        driver = webdriver.Chrome(service=ChromeService(get_chromedriver_path()), options=chrome_options)
+    except SessionNotCreatedException:
+        if CHROMEDRIVER_PATH:
+            raise
+        # the cached chromedriver no longer matches the installed Chrome
+        driver = webdriver.Chrome(service=ChromeService(get_chromedriver_path(refresh=True)), options=chrome_options)
+    if blocking is not None and blocking.enabled:
+        blocking.apply(driver)
+    return driver
+
+
+def _can_prompt():
+    return sys.stdin is not None and sys.stdin.isatty()
+
+
+def has_saved_login():
+    """True once a login has been completed with the persisted Chrome profile."""
+    return os.path.exists(LOGIN_MARKER_FILE)
+
+
+class DriverPool:
+    """
+    A bounded pool of Chrome WebDrivers that share one logged-in session.
+
+    The first driver is the login driver. It uses the persisted Chrome profile
+    in CHROME_PROFILE_DIR and, when visible, waits for the manual login. With
+    headless=None it runs headless once a login has been saved in that profile,
+    or when there is no terminal to log in from. Its cookies are then copied
+    into every other driver the pool starts, so the login only happens once.
+    Extra drivers run headless.
+
+    Drivers are checked out with acquire() and must be handed back with
+    release(). A driver is recycled after `max_pages` pages, when it is
+    released as broken, or when it fails the health check on checkout.
+
+    `blocking` (a resource_blocking.BlockingProfile) keeps pooled drivers from
+    downloading images, fonts, ads and trackers. The login driver loads
+    everything until the login step is done, then gets the same blocklist.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=POOL_MAX_PAGES_PER_DRIVER, headless=None,
+                 blocking=resource_blocking.DEFAULT_PROFILE):
+        if size < 1:
+            raise ValueError("Driver pool size must be at least 1.")
+        self.size = size
+        self.max_pages = max_pages
+        self.headless = headless
+        self.blocking = blocking
+        self._cond = threading.Condition()
+        self._login_lock = threading.Lock()
+        self._idle = []
+        self._in_use = set()
+        self._total = 0
+        self._page_counts = {}
+        self._session_cookies = None
+        self._closed = False
+
+    def start(self):
+        """Starts the login driver up front so the login prompt happens now."""
+        self.release(self.acquire())
 
-            if not headless: # only prompt for login if browser is visible
-                print("Navigating to Baltimore Banner for potential login...")
-                _driver_instance.get("https://www.thebaltimorebanner.com/")
+    def warm_up(self):
+        """
+        Starts the login driver, then launches the rest of the pool in parallel
+        so the first requests don't wait for Chrome to start.
+        """
+        self.start()
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            futures = [executor.submit(self.acquire) for _ in range(self.size)]
+        drivers = []
+        for future in futures:
+            try:
+                drivers.append(future.result())
+            except Exception as e:
+                print(f"Warm-up could not start a WebDriver: {e}")
+        for driver in drivers:
+            self.release(driver)
+
+    def acquire(self, timeout=None):
+        """Checks out a healthy driver, starting one if the pool has room."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("WebDriver pool is closed.")
+                    if self._idle:
+                        driver = self._idle.pop()
+                        break
+                    if self._total < self.size:
+                        self._total += 1
+                        driver = None
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a free WebDriver.")
+                    self._cond.wait(remaining)
+
+            if driver is None:
                 try:
-                    _driver_instance.find_element(webdriver.common.by.By.CSS_SELECTOR, 'button[aria-label*="Account"]') # ex
-                    print("It seems you might already be logged in (found account button).")
-                except: # not logged in if not found
-                    print("MANUAL STEP REQUIRED:")
-                    print("A Chrome browser window (controlled by Selenium) has opened.")
-                    print("Please log in to The Baltimore Banner in that window.")
-                    input("Press Enter in this console AFTER you have logged in to continue...")
-                print("Login step completed or skipped. Proceeding...")
+                    driver = self._spawn()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+                self._page_counts[id(driver)] = 0
+            elif not self._is_healthy(driver):
+                print("Discarding unresponsive WebDriver from the pool.")
+                self._retire(driver, healthy=False)
+                continue
 
-        except Exception as e:
-            print(f"Error initializing WebDriver: {e}")
-            _driver_instance = None # none if init failed
+            with self._cond:
+                self._in_use.add(driver)
+            return driver
+
+    def release(self, driver, broken=False):
+        """Returns a driver to the pool, recycling it if it is worn out or broken."""
+        with self._cond:
+            if driver not in self._in_use:
+                return # already retired by close()
+            self._in_use.discard(driver)
+            pages = self._page_counts.get(id(driver), 0) + 1
+            self._page_counts[id(driver)] = pages
+            keep = not broken and not self._closed and pages < self.max_pages
+            if keep:
+                self._idle.append(driver)
+                self._cond.notify()
+                return
+        if not broken:
+            print(f"Recycling WebDriver after {pages} pages.")
+        self._retire(driver, healthy=not broken)
+
+    def close(self):
+        """Quits every driver, including ones still checked out."""
+        with self._cond:
+            self._closed = True
+            drivers = self._idle + list(self._in_use)
+            self._idle = []
+            self._in_use.clear()
+            self._cond.notify_all()
+        for driver in drivers:
+            self._retire(driver, healthy=False)
+
+    def session_cookies(self):
+        """The logged-in session cookies, as returned by WebDriver.get_cookies()."""
+        return self._session_cookies
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'started': self._total,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+            }
+
+    def _spawn(self):
+        with self._login_lock:
+            if self._session_cookies is None:
+                headless = self.headless
+                if headless is None: # no point showing a browser nobody can log in with
+                    headless = has_saved_login() or not _can_prompt()
+                print(f"Initializing Selenium WebDriver ({'headless' if headless else 'visible'})...")
+                driver = create_driver(headless=headless, blocking=self.blocking if headless else None,
+                                       profile_dir=CHROME_PROFILE_DIR)
+                print("Selenium WebDriver initialized.")
+                try:
+                    self._login(driver, interactive=not headless)
+                except Exception:
+                    driver.quit()
+                    raise
+                if not headless and self.blocking.enabled:
+                    self.blocking.apply(driver)
+                return driver
+
+        print("Starting additional pooled WebDriver...")
+        driver = create_driver(headless=True, blocking=self.blocking)
+        try:
+            # cookies can only be set for the domain that is currently loaded
+            driver.get(BANNER_HOME_URL)
+            for cookie in self._session_cookies:
+                try:
+                    driver.add_cookie(cookie)
+                except WebDriverException as e:
+                    print(f"Could not copy cookie {cookie.get('name')}: {e}")
+        except Exception:
+            driver.quit()
             raise
-    return _driver_instance
+        return driver
+
+    def _login(self, driver, interactive):
+        print("Navigating to Baltimore Banner for potential login...")
+        driver.get(BANNER_HOME_URL)
+        try:
+            driver.find_element(By.CSS_SELECTOR, 'button[aria-label*="Account"]') # ex
+            print("It seems you might already be logged in (found account button).")
+            logged_in = True
+        except WebDriverException: # not logged in if not found
+            logged_in = False
+        if not logged_in and interactive and _can_prompt():
+            print("MANUAL STEP REQUIRED:")
+            print("A Chrome browser window (controlled by Selenium) has opened.")
+            print("Please log in to The Baltimore Banner in that window.")
+            input("Press Enter in this console AFTER you have logged in to continue...")
+            logged_in = True
+        elif not logged_in:
+            print("WARNING: Not logged in and no way to prompt for it; continuing without a session.")
+            print("Run once with a visible browser (SCRAPER_HEADLESS=0) from a terminal to log in.")
+        if logged_in:
+            os.makedirs(CHROME_PROFILE_DIR, exist_ok=True)
+            with open(LOGIN_MARKER_FILE, 'w', encoding='utf-8') as f:
+                f.write(time.strftime('%Y-%m-%d %H:%M:%S'))
+        print("Login step completed or skipped. Proceeding...")
+        self._session_cookies = driver.get_cookies()
+
+    def _is_healthy(self, driver):
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def _retire(self, driver, healthy):
+        if healthy:
+            # keep the freshest session cookies for the drivers started later
+            try:
+                self._session_cookies = driver.get_cookies()
+            except WebDriverException:
+                pass
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error while quitting WebDriver: {e}")
+        with self._cond:
+            self._page_counts.pop(id(driver), None)
+            self._total -= 1
+            self._cond.notify()
+
+
+_driver_pool = None # shared pool of logged-in drivers
+_driver_pool_lock = threading.Lock()
+
+def get_driver_pool(headless=None):
+    """
+    Gets the shared WebDriver pool, creating it (and running the login step)
+    on first use. headless=None defers to SCRAPER_HEADLESS, then to whether a
+    login has been saved (see DriverPool).
+    """
+    global _driver_pool
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            pool = DriverPool(headless=headless if headless is not None else HEADLESS)
+            pool.start()
+            _driver_pool = pool
+    return _driver_pool
+
+
+def get_driver_pool_stats():
+    """The shared pool's stats(), or None if it has not been started."""
+    pool = _driver_pool
+    return pool.stats() if pool is not None else None
+
+
+def warm_up_driver_pool(background=True):
+    """
+    Creates the shared pool and launches all of its drivers ahead of the first
+    scrape, by default on a daemon thread so startup is not blocked.
+    """
+    def warm_up():
+        try:
+            get_driver_pool().warm_up()
+            print("WebDriver pool warmed up.")
+        except Exception as e:
+            print(f"WebDriver pool warm-up failed: {e}")
+    if not background:
+        warm_up()
+        return None
+    thread = threading.Thread(target=warm_up, name='driver-pool-warm-up', daemon=True)
+    thread.start()
+    return thread
 
 
 def close_driver():
-    global _driver_instance
-    if _driver_instance:
-        print("Closing Selenium WebDriver...")
-        _driver_instance.quit()
-        _driver_instance = None
-        print("WebDriver closed.")
-
-def scrape_article_data(article_url):
+    """Closes every driver in the shared pool."""
+    global _driver_pool
+    with _driver_pool_lock:
+        pool, _driver_pool = _driver_pool, None
+    if pool:
+        print("Closing Selenium WebDriver pool...")
+        pool.close()
+        print("WebDriver pool closed.")
+    http_fetcher.close_session()
+
+# One round trip per poll: reports which pieces of the article are in the DOM
+# and a signature of the paywall overlay so we can tell when it stops changing.
+_READY_CHECK_JS = """
+const bodySelectors = arguments[0];
+const paywalls = document.querySelectorAll(arguments[1]);
+const bodyStyle = document.body ? getComputedStyle(document.body) : null;
+return {
+    body: bodySelectors.some(s => document.querySelector(s) !== null),
+    h1: document.querySelector('h1') !== null,
+    time: document.querySelector('time[datetime]') !== null,
+    complete: document.readyState === 'complete',
+    paywall: paywalls.length + '|' + (bodyStyle ? bodyStyle.overflow : ''),
+};
+"""
+
+
+class _ArticleReady:
     """
-    Scrapes data from a Baltimore Banner article URL using Selenium and BeautifulSoup.
-    Relies on a shared WebDriver instance managed by get_or_create_driver().
+    WebDriverWait condition: the body, h1 and time[datetime] are present and the
+    paywall overlay has not changed for `settle_seconds`. A page that finished
+    loading without a time[datetime] is treated as not having one. A missing
+    body or h1 is only given up on `grace_seconds` after the page finished
+    loading, since scripts often add them after the load event. A script error while the page is navigating or unloading counts as not
+    ready yet, so a client-side redirect doesn't fail the scrape.
     """
-    driver = None
+
+    def __init__(self, settle_seconds, grace_seconds=PAGE_COMPLETE_GRACE_SECONDS):
+        self.settle_seconds = settle_seconds
+        self.grace_seconds = grace_seconds
+        self._paywall = None
+        self._stable_since = None
+        self._complete_since = None
+
+    def __call__(self, driver):
+        try:
+            state = driver.execute_script(_READY_CHECK_JS, ARTICLE_BODY_SELECTORS, PAYWALL_SELECTOR)
+        except InvalidSessionIdException:
+            raise # the browser is gone, waiting won't help
+        except WebDriverException:
+            self._paywall = self._complete_since = None # start over on the next page
+            return False
+        now = time.monotonic()
+        if state['paywall'] != self._paywall:
+            self._paywall = state['paywall']
+            self._stable_since = now
+        if not state['complete']:
+            self._complete_since = None
+        elif self._complete_since is None:
+            self._complete_since = now
+        content_ready = state['body'] and state['h1'] and (state['time'] or state['complete'])
+        if not content_ready and self._complete_since is not None:
+            content_ready = now - self._complete_since >= self.grace_seconds
+        return content_ready and now - self._stable_since >= self.settle_seconds
+
+
+_wait_durations = deque(maxlen=1000) # recent (seconds, timed_out) pairs
+_wait_lock = threading.Lock()
+
+def wait_for_article_ready(driver, timeout=PAGE_READY_TIMEOUT):
+    """
+    Waits until the loaded page has what extraction needs, or `timeout` seconds.
+    Returns True if the page became ready, False if the ceiling was hit.
+    """
+    started = time.monotonic()
     try:
-        driver = get_or_create_driver(headless=False)
+        WebDriverWait(driver, timeout, poll_frequency=PAGE_READY_POLL).until(
+            _ArticleReady(PAYWALL_SETTLE_SECONDS))
+        ready = True
+    except TimeoutException:
+        print(f"Page not ready after {timeout}s; extracting what is there.")
+        ready = False
+    elapsed = time.monotonic() - started
+    with _wait_lock:
+        _wait_durations.append((elapsed, not ready))
+    return ready
+
+
+def get_wait_stats():
+    """Summarizes recent page-ready waits, for tuning PAGE_READY_TIMEOUT."""
+    with _wait_lock:
+        samples = list(_wait_durations)
+    if not samples:
+        return {'count': 0, 'timeouts': 0, 'ceiling': PAGE_READY_TIMEOUT}
+    durations = sorted(d for d, _ in samples)
+    pick = lambda q: durations[min(len(durations) - 1, int(q * len(durations)))]
+    return {
+        'count': len(durations),
+        'timeouts': sum(1 for _, timed_out in samples if timed_out),
+        'ceiling': PAGE_READY_TIMEOUT,
+        'mean': sum(durations) / len(durations),
+        'p50': pick(0.5),
+        'p95': pick(0.95),
+        'max': durations[-1],
+    }
+
+
+_fetch_stats = {'tiers': {'http': 0, 'selenium': 0}, 'escalations': {}, 'extraction': {}}
+_fetch_stats_lock = threading.Lock()
+
+def _count(group, key):
+    with _fetch_stats_lock:
+        counts = _fetch_stats[group]
+        counts[key] = counts.get(key, 0) + 1
+
+
+def get_tier_stats():
+    """
+    Hit counts per fetch tier, why HTTP fetches were escalated to Selenium, and
+    how often in-browser extraction succeeded or fell back to BeautifulSoup.
+    """
+    with _fetch_stats_lock:
+        return {group: dict(counts) for group, counts in _fetch_stats.items()}
+
+
+def _incomplete_reason(data):
+    if data['headline'] == "N/A - Headline not found":
+        return 'missing_headline'
+    if data['article_word_count'] <= MIN_ARTICLE_WORDS:
+        return 'short_body'
+    return None
+
+
+def _scrape_with_http(article_url, pool):
+    """
+    Fast path: fetches the article with requests and the pool's session cookies.
+    Returns (data, response); data is None if the page must be rendered in
+    Chrome, and response is None if the fetch itself failed.
+    """
+    http_fetcher.load_selenium_cookies(pool.session_cookies())
+    try:
+        with metrics.stage('http_fetch'):
+            response = http_fetcher.fetch(article_url)
+    except requests.RequestException as e:
+        print(f"HTTP fetch failed, falling back to Selenium: {e}")
+        _count('escalations', 'http_error')
+        return None, None
+    if 'html' not in response.headers.get('Content-Type', 'text/html'):
+        _count('escalations', 'not_html')
+        return None, response
+
+    metrics.record_size('http_html', response.content)
+    with metrics.stage('soup_parse'):
+        soup = make_soup(response.content, http_fetcher.declared_encoding(response))
+    with metrics.stage('paywall_check'):
+        paywalled = soup.select_one(PAYWALL_SELECTOR) is not None
+    if paywalled:
+        _count('escalations', 'paywall')
+        return None, response
+    data = {'url': article_url, **extract_from_soup(soup)}
+    reason = _incomplete_reason(data)
+    if reason:
+        _count('escalations', reason)
+        return None, response
+    _count('tiers', 'http')
+    return data, response
+
+
+def _scrape_with_selenium(article_url, pool):
+    try:
+        with metrics.stage('driver_acquire'):
+            driver = pool.acquire(timeout=POOL_ACQUIRE_TIMEOUT)
     except Exception as e:
         return {"error": f"Could not get Selenium WebDriver: {str(e)}"}
 
-    if not driver:
-         return {"error": "WebDriver instance is not available."}
-
+    broken = False
+    data = None
     try:
+        if MEASURE_PAGE_WEIGHT:
+            resource_blocking.read_page_weight(driver) # drop traffic from earlier pages
         print(f"Navigating to article: {article_url}")
-        driver.get(article_url)
-        time.sleep(5) # pause to wait for pay wall, js reading, etc
-        page_source = driver.page_source
+        with metrics.stage('driver_get'):
+            driver.get(article_url)
+        with metrics.stage('page_wait'):
+            wait_for_article_ready(driver) # wait for body, headline, date and pay wall
+        if BROWSER_EXTRACTION:
+            data = extract_in_browser(driver, article_url)
+            _count('extraction', 'browser' if data else 'soup_fallback')
+        if data is None:
+            with metrics.stage('page_source'):
+                page_source = driver.page_source
+            metrics.record_size('page_source', page_source)
+        if MEASURE_PAGE_WEIGHT:
+            with metrics.stage('page_weight'):
+                weight = resource_blocking.read_page_weight(driver)
+            resource_blocking.record_page_weight(weight, pool.blocking.enabled)
+            if weight:
+                print(f"Page weight: {weight['bytes']} bytes in {weight['requests']} requests ({weight['blocked_requests']} blocked)")
     except Exception as e:
+        broken = isinstance(e, WebDriverException)
         return {"error": f"Selenium could not load the article URL. Error: {e}"}
-    
-    # beautful soup implementation
-    soup = BeautifulSoup(page_source, 'html.parser')
-    data = {'url': article_url}
-
-    # headline
-    headline_tag = soup.select_one('h1.font-bold, h1[class*="headline"], header h1, h1[data-qa="Heading"]')
-    if not headline_tag: headline_tag = soup.find('h1')
-    if headline_tag:
-        headline_text = headline_tag.get_text(strip=True)
-        data['headline'] = headline_text
-        data['headline_word_count'] = count_words(headline_text)
-    else:
-        data['headline'] = "N/A - Headline not found"
-        data['headline_word_count'] = 0
-
-    # date posted
-    data['date_posted'] = "N/A - Date not found"
-    time_tag_dt = soup.find('time', attrs={'datetime': True})
-    if time_tag_dt and time_tag_dt.get('datetime'):
-        try:
-            date_str = time_tag_dt['datetime']
-            parsed_date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            data['date_posted'] = parsed_date.strftime('%B %d, %Y, %I:%M %p %Z')
-        except ValueError:
-            date_text_content = time_tag_dt.get_text(strip=True)
-            if date_text_content:
-                parsed_dt_text = parse_banner_date(date_text_content)
-                if parsed_dt_text != date_text_content: data['date_posted'] = parsed_dt_text
-
-    if data['date_posted'] == "N/A - Date not found":
-        # Look in typical byline/metadata containers
-        byline_containers = soup.select('div[class*="Byline"], div[class*="timestamp"], p[class*="timestamp"], span[class*="timestamp"], div[class*="PageMetaData"], div.items-center.text-sm')
-        for container in byline_containers:
-            text_content = container.get_text(" ", strip=True)
-            # More specific regex for dates within these containers
-            match = re.search(r"(\w+\s+\d{1,2},\s+\d{4}(?:,\s*\d{1,2}:\d{2}\s*(?:a\.m\.|p\.m\.)(?:\s*\w+)?)?)", text_content, re.IGNORECASE)
-            if match:
-                parsed_dt_text = parse_banner_date(match.group(1))
-                if parsed_dt_text != match.group(1) or "N/A" not in parsed_dt_text:
-                    data['date_posted'] = parsed_dt_text
-                    break
-        # Fallback to any <time> tag's text content if still not found
-        if data['date_posted'] == "N/A - Date not found":
-            all_time_tags = soup.find_all('time')
-            for t_tag in all_time_tags:
-                text = t_tag.get_text(strip=True)
-                if text:
-                    parsed_dt_text = parse_banner_date(text)
-                    if parsed_dt_text != text or "N/A" not in parsed_dt_text :
-                        data['date_posted'] = parsed_dt_text
-                        break
+    finally:
+        pool.release(driver, broken=broken)
 
+    _count('tiers', 'selenium')
+    if data is not None:
+        return data
+    return parse_article_html(page_source, article_url)
 
-    # word count
-    article_text_content = ""
-    text_extraction_block = None
-
-    article_body_selectors = [
-        'div.rich-text__content',
-        'div.rich-text--article-body',
-        'div[data-qa="ArticleBody"]',
-        'section[data-qa="ArticleBody"]',
-        'div[class*="article-body"]',
-        'div[class*="ArticlePage-articleBody"]',
-        'article[class*="ArticlePage"] div[class*="body"]',
-        'article .entry-content',
-        'article'
-    ]
-    for selector in article_body_selectors:
-        block = soup.select_one(selector)
-        if block:
-            # filter out known non-content blocks if using a broad selector like 'article'
-            if selector == 'article':
-                for non_content_selector in ['header', 'footer', '.related-articles', '.comments']:
-                    for el in block.select(non_content_selector):
-                        el.decompose() # remove these parts before getting text
-
-            temp_text = block.get_text(separator=' ', strip=True)
-            if count_words(temp_text) > 50: # Require a reasonable amount of text
-                article_text_content = temp_text
-                text_extraction_block = block
-                # print(f"DEBUG: Text extracted using selector: '{selector}'")
-                break
-    data['article_word_count'] = count_words(article_text_content)
-
-    # images and number of images
-    images = []
-    found_image_srcs = set()
-    search_context_for_images = text_extraction_block if text_extraction_block and data['article_word_count'] > 0 else soup
-
-    if search_context_for_images:
-        figure_tags = search_context_for_images.find_all('figure', recursive=True) # recursive is default but explicit
-        for fig in figure_tags:
-            img_tag = fig.find('img')
-            if img_tag:
-                src = img_tag.get('src') or img_tag.get('data-src') # check data-src for lazy loading
-                if src and src.startswith('http') and src not in found_image_srcs:
-                    # attempt to get a more meaningful alt text from figcaption if img alt is poor
-                    alt_text = img_tag.get('alt', '')
-                    figcaption_tag = fig.find('figcaption')
-                    caption_text = figcaption_tag.get_text(strip=True) if figcaption_tag else ''
-                    
-                    final_alt = alt_text
-                    if (not alt_text or alt_text.lower() in ["image", "photo", "", "graphic", "illustration"]) and caption_text:
-                        final_alt = caption_text
-                    elif caption_text and alt_text != caption_text and alt_text.lower() not in ["image", "photo", "", "graphic", "illustration"]:
-                         final_alt = f"{alt_text} - {caption_text}"
-                    
-                    images.append({'src': src, 'alt': final_alt if final_alt else "Article Image"})
-                    found_image_srcs.add(src)
-        
-        if not images and text_extraction_block:
-            direct_img_tags = text_extraction_block.find_all('img')
-            for img_tag in direct_img_tags:
-                src = img_tag.get('src') or img_tag.get('data-src')
-                if src and src.startswith('http') and src not in found_image_srcs:
-                    # Add filters to avoid tiny/irrelevant images
-                    width = img_tag.get('width', '0')
-                    height = img_tag.get('height', '0')
-                    try: # ensure width/height are digits if present
-                        w, h = int(re.sub(r'\D', '', width)), int(re.sub(r'\D', '', height))
-                        if w < 100 and h < 100 and (w != 0 or h != 0): # Skip small images if dimensions are known
-                            continue
-                    except ValueError:
-                        pass # if width/height not parsable, proceed
-                    
-                    if any(keyword in src.lower() for keyword in ['logo', 'avatar', 'icon', 'ads', 'spinner', 'gravatar', 'pixel', 'banner/button', 'feed']):
-                        continue
-
-                    alt_text = img_tag.get('alt', 'Article Image')
-                    images.append({'src': src, 'alt': alt_text})
-                    found_image_srcs.add(src)
-
-    data['images'] = images
-    data['image_count'] = len(images)
+
+def scrape_article_data(article_url, refresh=False, timings=False):
+    """
+    Scrapes data from a Baltimore Banner article URL. Tries a plain HTTP fetch
+    first and escalates to a pooled Selenium WebDriver (see get_driver_pool())
+    when the HTML is incomplete or paywalled.
+
+    Results are cached by normalized URL (see result_cache). An expired entry
+    is served again if the site confirms with 304 Not Modified that the page
+    is unchanged. refresh=True skips the cache lookup and re-scrapes.
+
+    Every call is traced (see metrics). timings=True adds that call's
+    breakdown to the result under 'timings'.
+    """
+    with metrics.traced() as trace:
+        data, tier = _scrape_article_data(article_url, refresh)
+        metrics.record_label('fetch_tier', tier)
+    if timings:
+        data = dict(data, timings=trace.to_dict())
     return data
 
 
+def _scrape_article_data(article_url, refresh):
+    """Returns (data, tier), where tier says where the result came from."""
+    cache = get_result_cache()
+    if cache is not None:
+        if refresh:
+            cache.record('bypassed')
+        else:
+            with metrics.stage('cache_lookup'):
+                entry = cache.get(article_url)
+            if entry is not None and is_fresh(entry):
+                return dict(entry.data, url=article_url), 'cache'
+            if entry is not None:
+                with metrics.stage('revalidate'):
+                    not_modified = http_fetcher.is_not_modified(article_url, entry.etag, entry.last_modified)
+                if not_modified:
+                    cache.touch(article_url)
+                    cache.record('revalidated')
+                    return dict(entry.data, url=article_url), 'revalidated'
+
+    try:
+        with metrics.stage('driver_pool'):
+            pool = get_driver_pool()
+    except Exception as e:
+        return {"error": f"Could not get Selenium WebDriver: {str(e)}"}, 'error'
+
+    data, response, tier = None, None, 'http'
+    if HTTP_FAST_PATH:
+        data, response = _scrape_with_http(article_url, pool)
+    if data is None:
+        data, tier = _scrape_with_selenium(article_url, pool), 'selenium'
+    if "error" in data:
+        return data, 'error'
+
+    if cache is not None and _incomplete_reason(data):
+        # no validators: a 304 for an unchanged page must not keep a bad result alive
+        cache.put(article_url, data, ttl=CACHE_INCOMPLETE_TTL)
+    elif cache is not None:
+        etag, last_modified = http_fetcher.validators(response) if response is not None else (None, None)
+        cache.put(article_url, data, etag=etag, last_modified=last_modified)
+    return data, tier
+
+
+# Runs the same selector logic as extractor.extract_article() inside the page and
+# returns only the strings it needs, instead of the whole serialized DOM.
+# Text is gathered the way BeautifulSoup's get_text(sep, strip=True) does it.
+_EXTRACT_JS = """
+const [headlineSelector, bodySelectors, bylineSelector, nonContentSelector, minWords] = arguments;
+const SKIP = new Set(['SCRIPT', 'STYLE', 'TEMPLATE', 'NOSCRIPT']); // noscript is raw text when scripting is on
+function textOf(el, sep) {
+    const parts = [];
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+        if (node.parentNode && SKIP.has(node.parentNode.nodeName)) continue;
+        const text = node.nodeValue.trim();
+        if (text) parts.push(text);
+    }
+    return parts.join(sep);
+}
+function wordCount(text) {
+    const words = text.match(/[\\p{L}\\p{N}_]+/gu);
+    return words ? words.length : 0;
+}
+
+const headline = document.querySelector(headlineSelector) || document.querySelector('h1');
+const timeDt = document.querySelector('time[datetime]');
+
+let root = document;
+let block = null;
+let bodyText = '';
+let bodySelector = null;
+for (const selector of bodySelectors) {
+    let candidate = root.querySelector(selector);
+    if (!candidate) continue;
+    if (selector === 'article') {
+        // strip non-content from a copy so the live page is left untouched
+        root = document.documentElement.cloneNode(true);
+        candidate = root.querySelector('article');
+        candidate.querySelectorAll(nonContentSelector).forEach(el => el.remove());
+    }
+    const text = textOf(candidate, ' ');
+    if (wordCount(text) > minWords) {
+        block = candidate;
+        bodyText = text;
+        bodySelector = selector;
+        break;
+    }
+}
+
+const figures = [];
+for (const fig of (block || root).querySelectorAll('figure')) {
+    const img = fig.querySelector('img');
+    if (!img) continue;
+    const caption = fig.querySelector('figcaption');
+    figures.push([img.getAttribute('src') || img.getAttribute('data-src'), img.getAttribute('alt'),
+                  caption ? textOf(caption, '') : '']);
+}
+const images = [];
+if (block && !figures.some(f => f[0] && f[0].startsWith('http'))) {
+    for (const img of block.querySelectorAll('img')) {
+        images.push([img.getAttribute('src') || img.getAttribute('data-src'), img.getAttribute('alt'),
+                     img.getAttribute('width'), img.getAttribute('height')]);
+    }
+}
+
+return {
+    headline: headline ? textOf(headline, '') : null,
+    time_dt: timeDt && timeDt.getAttribute('datetime') ? [timeDt.getAttribute('datetime'), textOf(timeDt, '')] : null,
+    bylines: Array.from(document.querySelectorAll(bylineSelector), el => textOf(el, ' ')),
+    times: Array.from(document.querySelectorAll('time'), el => textOf(el, '')),
+    body: block ? bodyText : null,
+    paragraphs: block ? Array.from(block.querySelectorAll('p')).filter(p => textOf(p, '')).length : 0,
+    selector: bodySelector,
+    figures: figures,
+    images: images,
+};
+"""
+
+
+def extract_in_browser(driver, article_url):
+    """
+    Extracts the article data with a script run in the loaded page. Returns the
+    same dict as parse_article_html(), or None if the script failed or found no
+    headline/body, in which case the caller should parse driver.page_source.
+    """
+    try:
+        with metrics.stage('browser_extract'):
+            payload = driver.execute_script(
+                _EXTRACT_JS, HEADLINE_SELECTOR, ARTICLE_BODY_SELECTORS, BYLINE_SELECTOR,
+                ', '.join(NON_CONTENT_SELECTORS), MIN_ARTICLE_WORDS)
+    except WebDriverException as e:
+        print(f"In-browser extraction failed, falling back to page source: {e}")
+        return None
+    if not payload or payload.get('headline') is None or payload.get('body') is None:
+        return None
+    metrics.record_size('browser_payload', json.dumps(payload))
+    metrics.record_label('body_selector', payload['selector'])
+
+    data = {'url': article_url, **build_article_data(
+        payload['headline'], payload['time_dt'], lambda: payload['bylines'], lambda: payload['times'],
+        analyze(payload['body'], payload['paragraphs']), payload['figures'], lambda: payload['images'])}
+    if _incomplete_reason(data):
+        return None
+    return data
+
+
+def parse_article_html(page_source, article_url):
+    """Extracts the article data from a page's HTML."""
+    return {'url': article_url, **extract_article(page_source)}
+
+
 if __name__ == '__main__':
     # test script for direct execution
     test_url = "https://www.thebaltimorebanner.com/politics-power/national-politics/trump-librarian-congress-carla-hayden-E7CCMFF425CGXIVY3BXAMKWHSE/"
@@ -262,8 +809,8 @@ if __name__ == '__main__':
     print(f"\n--- Testing Selenium Scraper for URL: {test_url} ---")
     
     try:
-        # this call ensures the driver is up and login prompt is shown if needed.
-        get_or_create_driver(headless=False) # force non-headless for testing login
+        # this call ensures the pool is up and login prompt is shown if needed.
+        get_driver_pool() # login prompt is shown if no login has been saved yet
         
         print(f"Attempting to scrape: {test_url}")
         scraped_info = scrape_article_data(test_url)
@@ -284,5 +831,5 @@ if __name__ == '__main__':
     except Exception as e:
         print(f"An error occurred during the test: {e}")
     finally:
-        close_driver() # close the driver when the test script finishes
+        close_driver() # close the driver pool when the test script finishes
     print("--- End Selenium Scraping Test ---")
\ No newline at end of file
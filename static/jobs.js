@@ -0,0 +1,74 @@
+// Submits the form as a background job and fills in the results when it
+// finishes, so the page never waits on a blocking request. Without fetch or
+// EventSource the form falls back to a normal POST.
+(function () {
+  const form = document.getElementById("analyze-form");
+  const statusLine = document.getElementById("job-status");
+  const results = document.getElementById("results");
+  if (!form || !window.fetch || !window.EventSource) return;
+
+  const STATUS_TEXT = {
+    queued: "Queued, waiting for a free browser...",
+    running: "Scraping article...",
+  };
+
+  function showStatus(text) {
+    statusLine.textContent = text;
+    statusLine.hidden = !text;
+  }
+
+  async function showResults(job) {
+    const response = await fetch(job.html_url);
+    results.innerHTML = await response.text();
+    showStatus("");
+  }
+
+  function follow(job) {
+    const events = new EventSource(job.events_url);
+    events.addEventListener("status", (event) => {
+      const snapshot = JSON.parse(event.data);
+      if (snapshot.status === "done" || snapshot.status === "error") {
+        events.close();
+        showResults(job);
+      } else {
+        showStatus(STATUS_TEXT[snapshot.status] || snapshot.status);
+      }
+    });
+    events.onerror = () => {
+      // fall back to polling if the event stream drops
+      events.close();
+      poll(job);
+    };
+  }
+
+  async function poll(job) {
+    const response = await fetch(job.status_url);
+    const snapshot = await response.json();
+    if (snapshot.status === "done" || snapshot.status === "error") {
+      showResults(job);
+    } else {
+      showStatus(STATUS_TEXT[snapshot.status] || snapshot.status);
+      setTimeout(() => poll(job), 1000);
+    }
+  }
+
+  form.addEventListener("submit", async (event) => {
+    event.preventDefault();
+    results.innerHTML = "";
+    showStatus("Submitting...");
+    try {
+      const response = await fetch("/jobs", { method: "POST", body: new FormData(form) });
+      const job = await response.json();
+      if (!response.ok) {
+        showStatus("");
+        results.innerHTML = '<div class="error-message"><p></p></div>';
+        results.querySelector("p").textContent = job.error;
+        return;
+      }
+      showStatus(STATUS_TEXT[job.status] || job.status);
+      follow(job);
+    } catch (error) {
+      showStatus("Could not reach the server: " + error);
+    }
+  });
+})();
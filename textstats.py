@@ -0,0 +1,128 @@
+# textstats.py
+# Word counts, body text statistics and Banner date parsing, with every
+# regex compiled once at import. Results match the original count_words()
+# and parse_banner_date() from extractor.py exactly.
+import calendar
+import math
+import re
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+WORDS_PER_MINUTE = 238 # average adult silent reading speed, for reading_minutes
+DATE_CACHE_SIZE = 1024 # recent date strings remembered by parse_banner_date()
+
+# --- words and body stats ---
+
+# Matching only the first character of each run of word characters gives the
+# same total as counting \b\w+\b matches. findall() still builds a list, one
+# entry per word, but every entry is a cached one-character string, so the
+# words themselves are never copied. That beats finditer() by about a fifth.
+_WORD_START_RE = re.compile(r'(?<!\w)\w')
+# One scan for both: a word start yields its first character, a sentence end
+# (., ! or ? followed by a space, closing quote/bracket or the end) yields ''.
+# As with _WORD_START_RE, findall() lists one short string per token.
+_TOKEN_RE = re.compile(r'(?<!\w)(\w)|[.!?]+(?=[\s"\'”’)\]]|$)')
+# 'İ' is the only character that lowercases to two (i + combining dot), which
+# splits a word in two. The old lowercasing count did that, so keep doing it.
+_SPLITS_WHEN_LOWERED = 'İ'
+
+TextStats = namedtuple('TextStats', ['words', 'sentences', 'paragraphs', 'reading_minutes'])
+EMPTY_STATS = TextStats(0, 0, 0, 0)
+
+
+def count_words(text):
+    if not text:
+        return 0
+    if _SPLITS_WHEN_LOWERED in text:
+        text = text.lower()
+    return len(_WORD_START_RE.findall(text))
+
+
+def analyze(text, paragraphs=0):
+    """
+    Words, sentences and reading time of body text in a single scan. Words are
+    counted exactly like count_words(). A sentence is a run of words ending in
+    '.', '!' or '?' (or at the end of the text), so abbreviations such as
+    "Dr." count as one. `paragraphs` is the caller's count from the markup;
+    text with words always has at least one.
+    """
+    if not text:
+        return EMPTY_STATS
+    if _SPLITS_WHEN_LOWERED in text:
+        text = text.lower()
+    words = sentences = 0
+    in_sentence = False
+    for token in _TOKEN_RE.findall(text):
+        if token:
+            words += 1
+            in_sentence = True
+        elif in_sentence:
+            sentences += 1
+            in_sentence = False
+    if not words:
+        return EMPTY_STATS
+    return TextStats(words, sentences + in_sentence, max(paragraphs, 1), math.ceil(words / WORDS_PER_MINUTE))
+
+
+# --- dates ---
+# One anchored regex covers every format the scraper accepts, so a date string
+# is matched once and its fields read straight from the groups instead of
+# trying strptime() formats until one stops raising ValueError:
+#   "%B %d, %Y, %I:%M %p"  "%B %d, %Y, %I:%M%p"  "%B %d, %Y"  (and %b for each)
+#   "%m/%d/%Y %I:%M %p"    "%m/%d/%Y"
+# optionally followed by a US time zone abbreviation. The field patterns are
+# the ones strptime() uses, so exactly the same strings are accepted.
+
+_TIME_ZONES = ('EDT', 'EST', 'CDT', 'CST', 'MDT', 'MST', 'PDT', 'PST')
+_TZ_RE = re.compile(rf"\b({'|'.join(_TIME_ZONES)})\b")
+
+_MONTHS = {}
+for _number in range(1, 13):
+    _MONTHS[calendar.month_name[_number].lower()] = _number
+    _MONTHS[calendar.month_abbr[_number].lower()] = _number
+_MONTH_NAMES = '|'.join(sorted(_MONTHS, key=len, reverse=True))
+
+_DAY = r'3[01]|[12]\d|0[1-9]|[1-9]| [1-9]'
+_HOUR = r'1[0-2]|0[1-9]|[1-9]| [1-9]'
+_MINUTE = r'[0-5]\d|\d'
+_DATE_RE = re.compile(
+    rf'(?:(?P<month_name>{_MONTH_NAMES})\s+(?P<day>{_DAY}),\s+(?P<year>\d\d\d\d)'
+    rf'(?:,\s+(?P<hour>{_HOUR}):(?P<minute>{_MINUTE})\s*(?P<ampm>am|pm))?'
+    rf'|(?P<month>1[0-2]|0[1-9]|[1-9])/(?P<num_day>{_DAY})/(?P<num_year>\d\d\d\d)'
+    rf'(?:\s+(?P<num_hour>{_HOUR}):(?P<num_minute>{_MINUTE})\s+(?P<num_ampm>am|pm))?)'
+    rf"(?:\s+(?-i:(?P<tz>{'|'.join(_TIME_ZONES)})))?",
+    re.IGNORECASE)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_banner_date(date_text):
+    if not date_text or date_text.strip().lower() == "n/a - date not found":
+        return "N/A - Date not found"
+    date_text_normalized = date_text.replace("a.m.", "AM").replace("p.m.", "PM").strip()
+    match = _DATE_RE.fullmatch(date_text_normalized)
+    tz_suffix = " " + match.group('tz') if match and match.group('tz') else ""
+    if match is None:
+        # a time zone somewhere other than the end is dropped wherever it is
+        tz_match = _TZ_RE.search(date_text_normalized)
+        if tz_match is None:
+            return date_text
+        tz_suffix = " " + tz_match.group(1)
+        match = _DATE_RE.fullmatch(_TZ_RE.sub("", date_text_normalized).strip())
+        if match is None:
+            return date_text
+
+    if match.group('month_name') is not None:
+        month = _MONTHS.get(match.group('month_name').lower())
+        day, year, hour, minute, ampm = match.group('day', 'year', 'hour', 'minute', 'ampm')
+    else:
+        month = int(match.group('month'))
+        day, year, hour, minute, ampm = match.group('num_day', 'num_year', 'num_hour', 'num_minute', 'num_ampm')
+    if month is None: # matched only through case folding, e.g. a long s for "s"
+        return date_text
+    hour = int(hour) % 12 + (12 if ampm.lower() == 'pm' else 0) if hour else 0
+    try:
+        dt_obj = datetime(int(year), month, int(day), hour, int(minute) if minute else 0)
+    except ValueError: # e.g. February 30
+        return date_text
+    return dt_obj.strftime('%B %d, %Y, %I:%M %p') + tz_suffix